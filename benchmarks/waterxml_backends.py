@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+:Module: waterxml_backends.py
+
+:Synopsis: Compare the speed of the xml parser backends of waterxml.py on a synthetic WATERSimulation.xml
+file with 3 SimulID's and 30 years of daily timeseries, and check that all backends give the same results.
+Each step is run a number of times and the best time is shown.
+
+:Usage: python benchmarks/waterxml_backends.py [number of years] [number of runs]
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import datetime
+import random
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# my modules
+from waterapputils.modules import waterxml
+
+def write_synthetic_file(filepath, years = 30, num_simulations = 3):
+    """
+    Write a synthetic WATERSimulation.xml file with the same structure as a WATER database file.
+    Some elements have attributes that are not in sorted order, and some elements are empty, 
+    so that differences in how the backends write files show up.
+
+    Parameters
+    ----------
+    filepath : string
+        String path of the file to write
+    years : int
+        Number of years of daily timeseries values
+    num_simulations : int
+        Number of SimulID's
+    """
+    random.seed(1)
+    start_date = datetime.date(1981, 1, 1)
+    num_days = (datetime.date(start_date.year + years, 1, 1) - start_date).days
+
+    timeseries = [("StudyUnitDischargeSeries", 54, "mm per day", [round(random.uniform(0, 500), 3) for i in range(num_days)]),
+                  ("ClimaticPrecipitationSeries", 4, "mm", [round(random.uniform(0, 30), 2) for i in range(num_days)]),
+                  ("ClimaticTemperatureSeries", 31, "Celsius", [round(random.uniform(-20, 35), 1) for i in range(num_days)])]
+
+    with open(filepath, "w") as f:
+        f.write('<?xml version="1.0" standalone="yes"?>\n<Project Version="2" Source="WATER">\n<ProjID>1</ProjID>\n<UserName>jlant</UserName>\n'
+                '<DateCreated>2014-04-22T10:00:00.0000-00:00</DateCreated>\n<ProjName>benchmark</ProjName>\n'
+                '<Study>\n<StudyID>1</StudyID>\n<ProjID>1</ProjID>\n<StudyLocDecDeg>40.5, -75.9</StudyLocDecDeg>\n'
+                '<StudyDescription>Synthetic simulation</StudyDescription>\n<StudyNotes />\n')
+
+        for sim_id in range(1, num_simulations + 1):
+            f.write('<StudySimulation Status="complete" Created="2014-04-22">\n<SimulID>{0}</SimulID>\n<StudyID>1</StudyID>\n<RegionType>{1}</RegionType>\n'
+                    '<SimulationNotes/>\n'.format(sim_id, sim_id + 2))
+            f.write("<SimulationFeatures>\n<AttID>1</AttID>\n<SimulID>{0}</SimulID>\n<AttName>Study Unit Total Area</AttName>\n"
+                    "<AttMeanVal>{1}</AttMeanVal>\n</SimulationFeatures>\n".format(sim_id, 100.0 * sim_id))
+
+            for bin_id in range(1, 4):
+                f.write("<SimulationTopographicWetnessIndex>\n<BinID>{0}</BinID>\n<SimulID>{1}</SimulID>\n<BinValueMean>{2}</BinValueMean>\n"
+                        "<BinValueFraction>0.1</BinValueFraction>\n</SimulationTopographicWetnessIndex>\n".format(bin_id, sim_id, 2.0 + bin_id))
+
+            for tag, units_code, units, values in timeseries:
+                for i, value in enumerate(values):
+                    f.write("<{0}>\n<SeriesID>{1}</SeriesID>\n<SimulID>{2}</SimulID>\n<SeriesDate>{3}T00:00:00-05:00</SeriesDate>\n"
+                            "<SeriesValue>{4}</SeriesValue>\n<SeriesUnitsCode>{5}</SeriesUnitsCode>\n<SeriesUnit>{6}</SeriesUnit>\n</{0}>\n".format(
+                            tag, i + 1, sim_id, (start_date + datetime.timedelta(i)).isoformat(), value, units_code, units))
+
+            f.write("</StudySimulation>\n")
+
+        f.write("</Study>\n</Project>\n")
+
+def run_backend(name, filepath, save_path, runs = 3):
+    """
+    Time reading, getting the data of, and writing a WATERSimulation.xml file with a backend;
+    the best time of a number of runs of each step is kept.
+
+    Parameters
+    ----------
+    name : string
+        String name of the backend
+    filepath : string
+        String path of the xml file
+    save_path : string
+        String path of the directory to write the output file to
+    runs : int
+        Number of times each step is run
+
+    Returns
+    -------
+    times : dictionary
+        Dictionary of the best seconds each step took
+    results : dictionary
+        Dictionary of the xml data and the text of the written file
+    """
+    waterxml.set_backend(name = name)
+
+    times = dict((step, float("inf")) for step in ["read_file", "get_xml_data", "write_file", "read_xml_data"])
+
+    for i in range(runs):
+        start = time.time()
+        waterxml_tree = waterxml.read_file(filepath)
+        times["read_file"] = min(times["read_file"], time.time() - start)
+
+        start = time.time()
+        project, study, simulation = waterxml.get_xml_data(waterxml_tree = waterxml_tree)
+        times["get_xml_data"] = min(times["get_xml_data"], time.time() - start)
+
+        start = time.time()
+        waterxml.write_file(waterxml_tree = waterxml_tree, save_path = save_path, filename = name + ".xml")
+        times["write_file"] = min(times["write_file"], time.time() - start)
+
+        start = time.time()
+        waterxml.read_xml_data(filepath = filepath)
+        times["read_xml_data"] = min(times["read_xml_data"], time.time() - start)
+
+    with open(os.path.join(save_path, name + ".xml"), "r") as f:
+        written = f.read()
+
+    results = {"project": project, "study": study, "simulation": simulation, "written": written}
+
+    return times, results
+
+def main():
+    """ Run the benchmark for each installed backend """
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    save_path = tempfile.mkdtemp()
+    try:
+        filepath = os.path.join(save_path, "WATERSimulation.xml")
+        write_synthetic_file(filepath = filepath, years = years)
+        print("Synthetic file: {} years, 3 SimulID's, {:.1f} MB; best of {} runs\n".format(years, os.path.getsize(filepath) / 2.0 ** 20, runs))
+
+        steps = ["read_file", "get_xml_data", "write_file", "read_xml_data"]
+        print("{:<14}".format("backend") + "".join(["{:>15}".format(step) for step in steps]))
+
+        expected = None
+        for name in waterxml.XML_BACKENDS:
+            try:
+                times, results = run_backend(name = name, filepath = filepath, save_path = save_path, runs = runs)
+            except ImportError:
+                print("{:<14}not installed".format(name))
+                continue
+
+            print("{:<14}".format(name) + "".join(["{:>14.3f}s".format(times[step]) for step in steps]))
+
+            if expected is None:
+                expected = results
+            elif results != expected:
+                print("    results of {} differ from the results of the first backend".format(name))
+    finally:
+        shutil.rmtree(save_path)
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 import nose.tools
-import sys
+import sys, os
 import numpy as np
 from StringIO import StringIO
 
@@ -171,6 +171,32 @@ def test_read_file_in_data_file_bad():
     nose.tools.assert_equals(expected["November"], actual["November"])
     nose.tools.assert_equals(expected["December"], actual["December"])
     
+def test_read_columns_in():
+     
+    expected_january = np.array([1.3, 1.2, np.nan, 1.4, np.nan, 1.6])
+    expected_december = np.array([12.7, 12.8, 12.9, 12.3, 12.2, 12.3])
+     
+    actual = deltas.read_columns_in(StringIO(fixture["data_file_bad"]))
+
+    nose.tools.assert_equals("CanESM2", actual["Model"])
+    nose.tools.assert_equals("PET", actual["Variable"])
+    nose.tools.assert_equals(['11', '12', '21', '22', '31', '32'], actual["Tile"].tolist())
+
+    np.testing.assert_equal(expected_january, actual["January"])
+    np.testing.assert_equal(expected_december, actual["December"])
+
+    # read_file_in returns the same values as lists
+    actual_lists = deltas.read_file_in(StringIO(fixture["data_file1"]))
+    actual_columns = deltas.read_columns_in(StringIO(fixture["data_file1"]))
+
+    for key in actual_lists.keys():
+        nose.tools.assert_equals(actual_lists[key], np.asarray(actual_columns[key]).tolist())
+
+def test_convert_to_floats():
+
+    np.testing.assert_equal(np.array([1.5, -2.0, 3.25]), deltas.convert_to_floats(values = ["1.5", "-2", "3.25"], name = "January"))
+    np.testing.assert_equal(np.array([1.5, np.nan, 6.5]), deltas.convert_to_floats(values = ["1.5", "", "*6.5_"], name = "January"))
+
 def test_get_monthly_values():
 
     expected1 = [[1.3, 2.7, 3.3, 4.7, 5.3, 6.7, 7.3, 8.7, 9.3, 10.7, 11.3, 12.7], [1.2, 2.8, 3.2, 4.8, 5.2, 6.8, 7.2, 8.8, 9.2, 10.8, 11.2, 12.8]]
@@ -282,4 +308,60 @@ def test_calculate_avg_delta_values3():
     
     
     
-    
\ No newline at end of file
+    
+def test_create_delta_table():
+    
+    expected_values = np.array([[1.3, 2.7, 3.3, 4.7, 5.3, 6.7, 7.3, 8.7, 9.3, 10.7, 11.3, 12.7], 
+                                [1.2, 2.8, 3.2, 4.8, 5.2, 6.8, 7.2, 8.8, 9.2, 10.8, 11.2, 12.8], 
+                                [1.3, 2.9, 3.3, 4.9, 5.3, 6.9, 7.3, 8.9, 9.3, 10.9, 11.3, 12.9], 
+                                [1.4, 2.3, 3.4, 4.3, 5.4, 6.3, 7.4, 8.3, 9.4, 10.3, 11.4, 12.3], 
+                                [1.5, 2.2, 3.5, 4.2, 5.5, 6.2, 7.5, 8.2, 9.5, 10.2, 11.5, 12.2], 
+                                [1.6, 2.3, 3.6, 4.3, 5.6, 6.3, 7.6, 8.3, 9.6, 10.3, 11.6, 12.3]])
+    
+    actual = deltas.create_delta_table(deltas_data = fixture["sample_data"])
+    
+    nose.tools.assert_equals("PET", actual["Variable"])
+    nose.tools.assert_equals({"11": 0, "12": 1, "21": 2, "22": 3, "31": 4, "32": 5}, actual["index"])
+    np.testing.assert_equal(expected_values, actual["values"])
+
+    # a delta table is passed through as is
+    nose.tools.assert_true(deltas.get_delta_table(deltas_data = actual) is actual)
+
+def test_delta_table():
+    
+    deltas_data_list = [deltas.read_file_in(StringIO(fixture["data_file1"])), deltas.read_file_in(StringIO(fixture["data_file2"]))]
+
+    delta_table = deltas.DeltaTable(deltas_data_list = deltas_data_list)
+
+    for tile_list in [["11", "12"], ["11", "12", "32"], ["22"]]:
+        expected = {}
+        for deltas_data in deltas_data_list:
+            expected.update(deltas.calculate_avg_delta_values(deltas_data = deltas_data, tile_list = tile_list))
+
+        actual_data_list, actual = delta_table.get_deltas(tiles = tile_list)
+
+        nose.tools.assert_equals(deltas_data_list, actual_data_list)
+        nose.tools.assert_equals(expected, actual)
+
+    nose.tools.assert_almost_equals(1.3666666666666667, delta_table.calculate_avg_delta_values(tile_list = ["11", "12", "32"])["PET"]["January"])
+
+    # tile 41 is only in the Tmax delta data
+    nose.tools.assert_raises(ValueError, delta_table.calculate_avg_delta_values, ["41"])
+
+def test_read_delta_table():
+
+    delta_files = [os.path.join(os.getcwd(), "data", "deltas-gcm", name) for name in ["PET.txt", "Ppt.txt", "Tmax.txt"]]
+
+    expected = deltas.DeltaTable(deltas_data_list = [deltas.read_file(delta_file) for delta_file in delta_files])
+
+    actual = deltas.read_delta_table(delta_files = delta_files)
+
+    # the delta tables made from the columns match the delta tables made from the lists
+    for expected_table, actual_table in zip(expected.delta_tables, actual.delta_tables):
+        nose.tools.assert_equals(expected_table["Tile"], actual_table["Tile"])
+        nose.tools.assert_equals(expected_table["index"], actual_table["index"])
+        np.testing.assert_equal(expected_table["values"], actual_table["values"])
+
+    # the delta data is given as lists like read_file()
+    nose.tools.assert_equals(expected.deltas_data_list, actual.deltas_data_list)
+    nose.tools.assert_true(isinstance(actual.deltas_data_list[0]["Tile"], list))
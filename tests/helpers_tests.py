@@ -184,4 +184,50 @@ def test_create_nan_array():
 
     nose.tools.assert_equals(actual["array_2x2"].all(), expected["array_2x2"].all())
     nose.tools.assert_equals(actual["array_1x5"].all(), expected["array_1x5"].all())    
-    
\ No newline at end of file
+    
+def test_parse_dates():
+
+    # expected values
+    expected = {"mdy": np.array(["2014-04-09", "2014-12-31", "2016-02-29"], dtype = "datetime64[D]"),
+                "ymd": [datetime.datetime(2014, 4, 9, 0, 0), datetime.datetime(2015, 1, 1, 0, 0)]}
+
+    # actual values
+    actual = {"mdy": helpers.parse_dates(date_strs = ["4/9/2014", "12/31/2014", "2/29/2016"]),
+              "ymd": helpers.parse_dates(date_strs = ["2014-04-09", "2015-01-01"], order = "ymd", separator = "-", as_datetime = True)}
+
+    np.testing.assert_equal(actual["mdy"], expected["mdy"])
+    nose.tools.assert_equals(actual["ymd"].tolist(), expected["ymd"])
+    nose.tools.assert_equals(len(helpers.parse_dates(date_strs = [])), 0)
+
+    # invalid dates
+    nose.tools.assert_raises(ValueError, helpers.parse_dates, ["2/30/2014"])
+    nose.tools.assert_raises(ValueError, helpers.parse_dates, ["13/1/2014"])
+    nose.tools.assert_raises(ValueError, helpers.parse_dates, ["4/9"])
+
+    # invalid order
+    nose.tools.assert_raises(ValueError, helpers.parse_dates, ["4/9/2014"], "mdm")
+
+def test_convert_monthly_dict_to_array():
+
+    monthly_dict = {"January": 1.5, "February": 2.0, "March": 2.5, "April": 3.0, "May": 3.5, "June": 4.0, 
+                    "July": 4.5, "August": 5.5, "September": 6.0, "October": 6.5, "November": 7.0}
+
+    # expected values; December is missing
+    expected = np.array([1.5, 2.0, 2.5, 3.0, 3.5, 4.0, 4.5, 5.5, 6.0, 6.5, 7.0, np.nan])
+
+    # actual values
+    actual = helpers.convert_monthly_dict_to_array(monthly_dict = monthly_dict)
+
+    np.testing.assert_equal(actual, expected)
+
+def test_get_month_indices():
+
+    # expected values
+    expected = np.array([0, 3, 11])
+
+    # actual values
+    actual = {"datetime": helpers.get_month_indices(dates = [datetime.datetime(2014, 1, 31), datetime.datetime(2014, 4, 1), datetime.datetime(1969, 12, 31)]),
+              "datetime64": helpers.get_month_indices(dates = np.array(["2014-01-31", "2014-04-01", "1969-12-31"], dtype = "datetime64[D]"))}
+
+    np.testing.assert_equal(actual["datetime"], expected)
+    np.testing.assert_equal(actual["datetime64"], expected)
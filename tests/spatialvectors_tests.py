@@ -1,4 +1,5 @@
-import os, sys
+import os, sys, shutil
+import nose.tools
 import numpy as np
 import osgeo.ogr
 from StringIO import StringIO
@@ -361,6 +362,230 @@ def test_get_intersected_field_values4():
 
     np.testing.assert_equal(actual["newhydroid"], expected["newhydroid"])    
 
+def test_get_intersected_field_values_parallel():
+
+    # expected values to test with actual values
+    expected = {}
+    expected["newhydroid"] = {"01413500": ["149", "61", "22"], "01420500": ["440", "390", "257"], "01414500": None, "01435000": ["262", "220"]}   
+    expected["ncar_tiles"] = {"0": ["82", "83", "84", "72", "73", "74", "62", "63", "64", "52", "53", "42", "43", "32", "22"]}
+
+    # open the shapefiles
+    basin_shapefile = osgeo.ogr.Open(fixture["water_basins_nad83"])    
+    point_shapefile = osgeo.ogr.Open(fixture["wateruse_centroids_sample_nad83"])
+    test_poly_shapefile = osgeo.ogr.Open(fixture["test_poly_nad83"])    
+    ncar_shapefile = osgeo.ogr.Open(fixture["ncar_nad83"])
+
+    # actual values    
+    actual = {}
+    actual["newhydroid"] = spatialvectors.get_intersected_field_values(intersector = basin_shapefile, intersectee = point_shapefile, intersectee_field = "newhydroid", intersector_field = "STAID", processes = 3)
+    actual["ncar_tiles"] = spatialvectors.get_intersected_field_values(intersector = test_poly_shapefile, intersectee = ncar_shapefile, intersectee_field = "Tile", intersector_field = "", processes = 2)
+
+    for shapefile in [basin_shapefile, point_shapefile, test_poly_shapefile, ncar_shapefile]:
+        shapefile.Destroy()  
+
+    np.testing.assert_equal(actual["newhydroid"], expected["newhydroid"])
+    np.testing.assert_equal(actual["ncar_tiles"], expected["ncar_tiles"])
+
+def test_get_shapefile_geometry_arrays():
+
+    # expected values to test with actual values
+    expected = {}
+    expected["test_poly_nad83"] = [[1551876.4646765331, 2462788.591455278], [1646948.1658269956, 2513535.4955471633], [1785445.705257233, 2499530.126391299], 
+                                   [1813149.8783592982, 2413895.970528247], [1710314.4423011306, 2307638.3618463], [1745561.219742352, 2126904.9022905156], 
+                                   [1679365.164213511, 1873153.3560966868], [1603362.2856433871, 2074193.2284434838], [1594846.0132731413, 2155620.5060083373], 
+                                   [1571503.7313467045, 2231871.9603013936], [1551876.4646765331, 2462788.591455278]]
+
+    # open the shapefiles
+    basin_shapefile = osgeo.ogr.Open(fixture["water_basins_nad83"])    
+    test_poly_shapefile = osgeo.ogr.Open(fixture["test_poly_nad83"])    
+
+    # actual values    
+    geometry_arrays = spatialvectors.get_shapefile_geometry_arrays(shapefile = basin_shapefile)
+    test_poly_arrays = spatialvectors.get_shapefile_geometry_arrays(shapefile = test_poly_shapefile)
+
+    np.testing.assert_equal(spatialvectors.get_feature_rings(geometry_arrays = test_poly_arrays, feature_num = 0), [np.array(expected["test_poly_nad83"])])
+
+    # each ring and area matches the geometries read by ogr one at a time
+    areas = spatialvectors.get_geometry_areas(geometry_arrays = geometry_arrays)
+
+    basin_layer = basin_shapefile.GetLayer()
+    for feature_num in range(basin_layer.GetFeatureCount()):
+        basin_feature = basin_layer.GetFeature(feature_num)
+        basin_geometry = basin_feature.GetGeometryRef()
+
+        expected_rings = [np.array(basin_geometry.GetGeometryRef(k).GetPoints())[:, :2] for k in range(basin_geometry.GetGeometryCount())]
+
+        nose.tools.assert_equals(geometry_arrays["fids"][feature_num], basin_feature.GetFID())
+        np.testing.assert_equal(spatialvectors.get_feature_rings(geometry_arrays = geometry_arrays, feature_num = feature_num), expected_rings)
+        nose.tools.assert_equals(areas[feature_num], basin_geometry.GetArea())
+
+    for shapefile in [basin_shapefile, test_poly_shapefile]:
+        shapefile.Destroy()  
+
+def test_get_geometry_areas():
+
+    # a polygon with a hole and a triangle as a multipolygon, a feature without a geometry, a square, and a closed line
+    geometry_arrays = {"coords": np.array([[0.0, 0.0], [0.0, 10.0], [10.0, 10.0], [10.0, 0.0], [0.0, 0.0],
+                                           [4.0, 4.0], [6.0, 4.0], [6.0, 6.0], [4.0, 6.0], [4.0, 4.0],
+                                           [20.0, 0.0], [25.0, 5.0], [30.0, 0.0], [20.0, 0.0],
+                                           [0.0, 0.0], [0.0, 10.0], [10.0, 10.0], [10.0, 0.0], [0.0, 0.0],
+                                           [0.0, 0.0], [0.0, 10.0], [10.0, 10.0], [0.0, 0.0]]),
+                       "ring_offsets": np.array([0, 5, 10, 14, 19, 23]),
+                       "part_offsets": np.array([0, 2, 3, 4, 5]),
+                       "feature_offsets": np.array([0, 2, 2, 3, 4]),
+                       "polygon_parts": np.array([True, True, True, False])}
+
+    # expected values to test with actual values
+    expected = {}
+    expected["areas"] = np.array([121.0, 0.0, 100.0, 0.0])
+    expected["rings"] = [geometry_arrays["coords"][0:5], geometry_arrays["coords"][5:10], geometry_arrays["coords"][10:14]]
+
+    # actual values    
+    actual = {}
+    actual["areas"] = spatialvectors.get_geometry_areas(geometry_arrays = geometry_arrays)
+    actual["rings"] = spatialvectors.get_feature_rings(geometry_arrays = geometry_arrays, feature_num = 0)
+
+    np.testing.assert_equal(actual["areas"], expected["areas"])
+    np.testing.assert_equal(actual["rings"], expected["rings"])
+    nose.tools.assert_equals(spatialvectors.get_feature_rings(geometry_arrays = geometry_arrays, feature_num = 1), [])
+
+def test_get_envelope_candidates():
+
+    # envelopes (minx, maxx, miny, maxy) of 5 features; feature 3 has no geometry
+    envelopes = np.array([[0.0, 2.0, 0.0, 2.0], [5.0, 6.0, 5.0, 6.0], [1.0, 1.0, 3.0, 3.0], [np.nan, np.nan, np.nan, np.nan], [-4.0, 0.0, -4.0, 0.0]])
+    order = np.argsort(envelopes[:, 0], kind = "mergesort")
+
+    envelope_index = {"envelopes": envelopes, "order": order, "sorted_minx": envelopes[order, 0]}
+
+    # expected values to test with actual values
+    expected = {}
+    expected["overlap"] = np.array([0, 2])
+    expected["touch"] = np.array([0, 4])
+    expected["none"] = np.array([])
+
+    # actual values    
+    actual = {}
+    actual["overlap"] = spatialvectors.get_envelope_candidates(envelope_index = envelope_index, envelope = (0.5, 1.5, 0.5, 3.5))
+    actual["touch"] = spatialvectors.get_envelope_candidates(envelope_index = envelope_index, envelope = (-1.0, 0.0, -1.0, 0.0))
+    actual["none"] = spatialvectors.get_envelope_candidates(envelope_index = envelope_index, envelope = (3.0, 4.0, 3.0, 4.0))
+
+    np.testing.assert_equal(actual["overlap"], expected["overlap"])
+    np.testing.assert_equal(actual["touch"], expected["touch"])
+    np.testing.assert_equal(actual["none"], expected["none"])
+
+def test_points_in_polygon():
+
+    # square with a square hole, and a triangle; i.e. a multipolygon
+    rings = [np.array([[0.0, 0.0], [10.0, 0.0], [10.0, 10.0], [0.0, 10.0], [0.0, 0.0]]), 
+             np.array([[4.0, 4.0], [6.0, 4.0], [6.0, 6.0], [4.0, 6.0], [4.0, 4.0]]),
+             np.array([[20.0, 0.0], [30.0, 0.0], [25.0, 5.0], [20.0, 0.0]])]
+
+    # points inside, in the hole, on an edge, on a vertex, in the triangle, and outside
+    x = np.array([1.0, 5.0, 10.0, 4.0, 0.0, 25.0, 25.0, 15.0])
+    y = np.array([1.0, 5.0, 5.0, 5.0, 10.0, 1.0, 6.0, 1.0])
+
+    # expected values to test with actual values
+    expected = np.array([True, False, True, True, True, True, False, False])
+
+    # actual values    
+    actual = spatialvectors.points_in_polygon(x = x, y = y, rings = rings)
+
+    np.testing.assert_equal(actual, expected)
+
+    # test in blocks of points
+    actual = spatialvectors.points_in_polygon(x = x, y = y, rings = rings, block_size = 13)
+
+    np.testing.assert_equal(actual, expected)
+
+def test_intersection_cache():
+
+    # expected values to test with actual values
+    expected = {"01413500": ["149", "61", "22"], "01420500": ["440", "390", "257"], "01414500": None, "01435000": ["262", "220"]}   
+
+    key = spatialvectors.get_intersection_cache_key(intersector_path = fixture["water_basins_nad83"], intersectee_path = fixture["wateruse_centroids_sample_nad83"], intersectee_field = "newhydroid", intersector_field = "STAID")
+    other_key = spatialvectors.get_intersection_cache_key(intersector_path = fixture["water_basins_nad83"], intersectee_path = fixture["wateruse_centroids_nad83"], intersectee_field = "newhydroid", intersector_field = "STAID")
+    other_field_key = spatialvectors.get_intersection_cache_key(intersector_path = fixture["water_basins_nad83"], intersectee_path = fixture["wateruse_centroids_sample_nad83"], intersectee_field = "HUC_12", intersector_field = "STAID")
+
+    nose.tools.assert_not_equals(key, other_key)
+    nose.tools.assert_not_equals(key, other_field_key)
+
+    # write and read the cache
+    cache_path = os.path.join(os.getcwd(), "tests", "_water_basins.intersections.json")
+    spatialvectors.write_intersection_cache(cache_path = cache_path, key = key, field_values_dict = expected)
+
+    actual = spatialvectors.read_intersection_cache(cache_path = cache_path, key = key)
+
+    np.testing.assert_equal(actual, expected)
+    nose.tools.assert_true(all(isinstance(value, str) for values in actual.values() if values for value in values))
+
+    # a cache of other shapefiles or fields is not valid
+    nose.tools.assert_equals(spatialvectors.read_intersection_cache(cache_path = cache_path, key = other_key), None)
+    nose.tools.assert_equals(spatialvectors.read_intersection_cache(cache_path = cache_path, key = other_field_key), None)
+
+def test_get_cached_intersected_field_values():
+
+    # expected values to test with actual values
+    expected = {"01413500": ["149", "61", "22"], "01420500": ["440", "390", "257"], "01414500": None, "01435000": ["262", "220"]}
+
+    # copy the basin shapefile so that the cache file is written in the tests directory
+    basin_path = os.path.join(os.getcwd(), "tests", "_water_basins_nad83.shp")
+    for ext in [".shp", ".shx", ".dbf", ".prj"]:
+        shutil.copyfile(os.path.splitext(fixture["water_basins_nad83"])[0] + ext, os.path.splitext(basin_path)[0] + ext)
+
+    cache_path = spatialvectors.get_intersection_cache_path(intersector_path = basin_path, intersectee_path = fixture["wateruse_centroids_sample_nad83"])
+    key = spatialvectors.get_intersection_cache_key(intersector_path = basin_path, intersectee_path = fixture["wateruse_centroids_sample_nad83"], intersectee_field = "newhydroid", intersector_field = "STAID")
+
+    def get_actual():
+        basin_shapefile = osgeo.ogr.Open(basin_path)
+        point_shapefile = osgeo.ogr.Open(fixture["wateruse_centroids_sample_nad83"])
+
+        actual = spatialvectors.get_cached_intersected_field_values(intersector = basin_shapefile, intersectee = point_shapefile, intersectee_field = "newhydroid", intersector_field = "STAID")
+
+        for shapefile in [basin_shapefile, point_shapefile]:
+            shapefile.Destroy()
+
+        return actual
+
+    # the first call computes the field values and writes the cache file
+    if os.path.isfile(cache_path):
+        os.remove(cache_path)
+
+    np.testing.assert_equal(get_actual(), expected)
+    np.testing.assert_equal(spatialvectors.read_intersection_cache(cache_path = cache_path, key = key), expected)
+
+    # the second call returns the field values of the cache file
+    cached = dict(expected, **{"01414500": ["1"]})
+    spatialvectors.write_intersection_cache(cache_path = cache_path, key = key, field_values_dict = cached)
+
+    np.testing.assert_equal(get_actual(), cached)
+
+    # a change of the .dbf file computes the field values again and rewrites the cache file
+    with open(os.path.splitext(basin_path)[0] + ".dbf", "ab") as f:
+        f.write("\x1a")
+
+    np.testing.assert_equal(get_actual(), expected)
+    nose.tools.assert_equals(spatialvectors.read_intersection_cache(cache_path = cache_path, key = key), None)
+
+def test_get_shapefile_md5():
+
+    filepath = os.path.join(os.getcwd(), "tests", "_shapefile.shp")
+    with open(filepath, "w") as f:
+        f.write("shapes")
+
+    with open(os.path.join(os.getcwd(), "tests", "_shapefile.dbf"), "w") as f:
+        f.write("records")
+
+    md5 = spatialvectors.get_shapefile_md5(filepath)
+
+    # a change of any file of the shapefile changes the md5 hash
+    with open(os.path.join(os.getcwd(), "tests", "_shapefile.dbf"), "w") as f:
+        f.write("changed records")
+
+    nose.tools.assert_not_equals(spatialvectors.get_shapefile_md5(filepath), md5)
+
+    nose.tools.assert_equals(os.path.join(os.getcwd(), "tests", "_shapefile.shp.wateruse_centroids_nad83.intersections.json"), 
+                             spatialvectors.get_intersection_cache_path(intersector_path = filepath, intersectee_path = fixture["wateruse_centroids_nad83"]))
+
 def test_validate_field_values():
 
     # expected values to test with actual values
@@ -233,7 +233,28 @@ def test_get_date():
     actual = watertxt.get_date(date_str = fixture["date_str"])
 
     nose.tools.assert_equals(actual, expected)
-    
+
+def test_get_data_values():
+
+    dates = [datetime.datetime(2014, 4, 1, 0, 0), datetime.datetime(2014, 4, 2, 0, 0), datetime.datetime(2014, 4, 3, 0, 0)]
+
+    column_names = ["Discharge (cfs)", "Subsurface Flow (mm/day)"]
+
+    # clean rows are converted in a single pass
+    expected_clean = np.array([[5.0, 50.0], [10.0, 55.0], [1E-07, -60.0]])
+
+    actual_clean = watertxt.get_data_values(data_rows = ["5.0\t50.0", "10\t55.0", "1E-07\t-60.0\r"], dates = dates, column_names = column_names)
+
+    np.testing.assert_equal(actual_clean, expected_clean)
+    nose.tools.assert_true(actual_clean[:, 0].flags["C_CONTIGUOUS"])
+
+    # missing, bad, and extra values are converted row by row and replaced by nan
+    expected_bad = np.array([[5.0, 50.0], [np.nan, 55.0], [6.5, np.nan]])
+
+    actual_bad = watertxt.get_data_values(data_rows = ["5.0\t50.0\t", "\t55.0", "*6.5_"], dates = dates, column_names = column_names)
+
+    np.testing.assert_equal(actual_bad, expected_bad)
+
 def test_create_parameter():
 
     expected1 = {"name": None, "index": None, "data": [], "mean": None, "max": None, "min": None}
@@ -258,6 +279,83 @@ def test_create_parameter():
     nose.tools.assert_equals(actual2["max"], expected2["max"])
     nose.tools.assert_equals(actual2["min"], expected2["min"])
 
+def test_watertxt_class():
+
+    dates = np.array([datetime.datetime(2014, 4, 1, 0, 0), datetime.datetime(2014, 4, 2, 0, 0), datetime.datetime(2014, 4, 3, 0, 0)])
+
+    values = np.array([[2.0, 50.0], [6.0, 55.0], [10.0, 45.0]])
+
+    data = watertxt.WaterTxt(values = values, dates = dates, column_names = ["Discharge (cfs)", "Subsurface Flow (mm/day)"], user = "jlant", stationid = "012345")
+
+    nose.tools.assert_equals(data["user"], "jlant")
+    nose.tools.assert_equals(data["stationid"], "012345")
+    nose.tools.assert_equals(len(data["parameters"]), 2)
+
+    # parameters are found by name with or without units and hold views of the values array
+    discharge = watertxt.get_parameter(watertxt_data = data, name = "Discharge")
+
+    nose.tools.assert_equals(discharge["name"], "Discharge (cfs)")
+    nose.tools.assert_equals(discharge["index"], 0)
+    nose.tools.assert_equals(discharge["mean"], 6.0)
+    nose.tools.assert_equals(watertxt.get_parameter(watertxt_data = data, name = "Subsurface Flow (mm/day)")["max"], 55.0)
+    nose.tools.assert_equals(watertxt.get_parameter(watertxt_data = data, name = "PET"), None)
+    nose.tools.assert_true(np.may_share_memory(discharge["data"], data.array))
+
+    # new values are written in place and the stats are recomputed
+    watertxt.set_parameter_values(watertxt_data = data, name = "Discharge", values = np.array([1.0, 2.0, 6.0]))
+
+    np.testing.assert_equal(discharge["data"], np.array([1.0, 2.0, 6.0]))
+    nose.tools.assert_equals(discharge["mean"], 3.0)
+    nose.tools.assert_equals(discharge["min"], 1.0)
+
+    # adding parameters grows the values array and keeps every parameter's data
+    watertxt.add_parameter(watertxt_data = data, name = "Water Use (cfs)", param_data = np.array([3.0, 2.5, -5.5]))
+    watertxt.add_parameter(watertxt_data = data, name = "Discharge + Water Use (cfs)", param_data = np.array([4.0, 4.5, 0.5]))
+    watertxt.add_parameter(watertxt_data = data, name = "PET (mm/day)", param_data = np.array([5.0, 3.0, 13.0]))
+
+    nose.tools.assert_equals(data["column_names"], ["Discharge (cfs)", "Subsurface Flow (mm/day)", "Water Use (cfs)", "Discharge + Water Use (cfs)", "PET (mm/day)"])
+    nose.tools.assert_equals(data.array.shape, (3, 5))
+    nose.tools.assert_equals(watertxt.get_parameter(watertxt_data = data, name = "PET")["index"], 4)
+    nose.tools.assert_equals(watertxt.get_parameter(watertxt_data = data, name = "Water Use")["min"], -5.5)
+
+    for i, values_column in enumerate(watertxt.get_all_values(watertxt_data = data)):
+        np.testing.assert_equal(values_column, data.array[:, i])
+        nose.tools.assert_true(np.may_share_memory(data["parameters"][i]["data"], data.array))
+
+def test_watertxt_parameter_stats():
+
+    expected = {"mean": 6.0, "max": 10.0, "min": 2.0}
+
+    # every way of reading the values computes the stats
+    parameter = watertxt.WaterTxtParameter(name = "Discharge (cfs)", index = 0, data = np.array([2.0, 6.0, 10.0]))
+    actual = dict(parameter.iteritems())
+
+    for key in expected:
+        nose.tools.assert_equals(actual[key], expected[key])
+
+    parameter = watertxt.WaterTxtParameter(name = "Discharge (cfs)", index = 0, data = np.array([2.0, 6.0, 10.0]))
+    nose.tools.assert_true(all(value is not None for value in parameter.itervalues()))
+
+    parameter = watertxt.WaterTxtParameter(name = "Discharge (cfs)", index = 0, data = np.array([2.0, 6.0, 10.0]))
+    actual = parameter.copy()
+
+    for key in expected:
+        nose.tools.assert_equals(actual[key], expected[key])
+
+    # setting one stat keeps the set value and computes the other two
+    parameter = watertxt.WaterTxtParameter(name = "Discharge (cfs)", index = 0, data = np.array([2.0, 6.0, 10.0]))
+    parameter["mean"] = 5.0
+
+    nose.tools.assert_equals(parameter["mean"], 5.0)
+    nose.tools.assert_equals(parameter["max"], 10.0)
+    nose.tools.assert_equals(parameter["min"], 2.0)
+
+    # setting the data recomputes the stats
+    parameter["data"] = np.array([1.0, 2.0, 6.0])
+
+    nose.tools.assert_equals(parameter["mean"], 3.0)
+    nose.tools.assert_equals(parameter["max"], 6.0)
+
 @with_setup(setup, teardown)
 def test_add_parameter():
 
@@ -660,6 +758,23 @@ def test_apply_wateruse():
 
     nose.tools.assert_almost_equals(actual_discharge_and_wateruse["data"].all(), expected_discharge_and_wateruse["data"].all())
 
+def test_format_data_rows():
+
+    dates = np.array([datetime.datetime(2014, 4, 1, 0, 0), datetime.datetime(2014, 12, 31, 0, 0)])
+
+    values_all = [np.array([2, 6]), np.array([0.1, np.nan]), np.array([1.0 / 3, -0.0]), np.array([0.5, 2.25], dtype = np.float32)]
+
+    # expected values are formatted one value at a time as in the original WATER output text files
+    expected = []
+    for i in range(len(dates)):
+        row = [dates[i].strftime("%m/%d/%Y")] + ["{}".format(values[i]) for values in values_all]
+        expected.append("\t".join(row) + "\n")
+
+    actual = watertxt.format_data_rows(dates = dates, values_all = values_all)
+
+    nose.tools.assert_equals(actual, expected)
+    nose.tools.assert_equals(actual[0], "04/01/2014\t2\t0.1\t0.333333333333\t0.5\n")
+
 def test_write_file():
     """ Test write_file functionality """
 
@@ -695,6 +810,132 @@ def test_write_file():
     data = watertxt.apply_wateruse(watertxt_data = data, wateruse_totals = wateruse_totals)     
     watertxt.write_file(watertxt_data = data , save_path = os.path.join(os.getcwd(), "tests"), filename = "_WATER-with-wateruse.txt") 
 
+@with_setup(setup, teardown) 
+def test_read_file_cache():
+
+    filepath = os.path.join(os.getcwd(), "tests", "_WATER-cache.txt")
+    with open(filepath, "w") as f:
+        f.write(fixture["data_file_clean"])
+
+    values_path, header_path = watertxt.get_cache_paths(filepath)
+    for path in (values_path, header_path):
+        if os.path.isfile(path):
+            os.remove(path)
+
+    # first read parses the text file and writes the cache files
+    expected = watertxt.read_file(filepath)
+
+    nose.tools.assert_true(os.path.isfile(values_path))
+    nose.tools.assert_true(os.path.isfile(header_path))
+
+    # cache is valid for the unchanged text file
+    actual = watertxt.read_cache(filepath)
+
+    nose.tools.assert_equals(actual["user"], expected["user"])
+    nose.tools.assert_equals(actual["date_created"], expected["date_created"])
+    nose.tools.assert_equals(actual["stationid"], expected["stationid"])
+    nose.tools.assert_equals(actual["column_names"], expected["column_names"])
+    np.testing.assert_equal(actual["dates"], expected["dates"])
+
+    for i in range(len(expected["parameters"])):
+        nose.tools.assert_equals(actual["parameters"][i]["name"], expected["parameters"][i]["name"])
+        nose.tools.assert_equals(actual["parameters"][i]["mean"], expected["parameters"][i]["mean"])
+        np.testing.assert_equal(actual["parameters"][i]["data"], expected["parameters"][i]["data"])
+
+    # cache is not valid after a rewrite with the same size and modification time
+    stat = os.stat(filepath)
+    with open(filepath, "w") as f:
+        f.write(fixture["data_file_clean"].replace("jlant", "jlanx"))
+    os.utime(filepath, (stat.st_atime, stat.st_mtime))
+
+    nose.tools.assert_equals(watertxt.read_cache(filepath), None)
+
+    # cache is not valid after the text file changes
+    with open(filepath, "a") as f:
+        f.write("\n")
+
+    nose.tools.assert_equals(watertxt.read_cache(filepath), None)
+
+@with_setup(setup, teardown) 
+def test_open_mmap():
+
+    filepath = os.path.join(os.getcwd(), "tests", "_WATER-mmap.txt")
+    with open(filepath, "w") as f:
+        f.write(fixture["data_file_clean"])
+
+    for path in watertxt.get_cache_paths(filepath):
+        if os.path.isfile(path):
+            os.remove(path)
+
+    expected = watertxt.read_file(filepath, use_cache = False)
+
+    # first open writes the cache files and every open maps the data values read only 
+    for i in range(2):
+        actual = watertxt.open_mmap(filepath)
+
+        nose.tools.assert_false(actual.block.flags.writeable)
+        nose.tools.assert_equals(actual["column_names"], expected["column_names"])
+        np.testing.assert_equal(actual["dates"], expected["dates"])
+
+        for name in ["Discharge", "Subsurface Flow", "Return Flow"]:
+            np.testing.assert_equal(watertxt.get_parameter(actual, name = name)["data"], watertxt.get_parameter(expected, name = name)["data"])
+            nose.tools.assert_equals(watertxt.get_parameter(actual, name = name)["max"], watertxt.get_parameter(expected, name = name)["max"])
+
+    # setting values copies the data values to memory and leaves the cache file unchanged
+    actual = watertxt.set_parameter_values(actual, name = "Discharge", values = np.array([1.0, 2.0, 3.0]))
+
+    nose.tools.assert_true(actual.block.flags.writeable)
+    nose.tools.assert_equals(watertxt.get_parameter(actual, name = "Discharge")["mean"], 2.0)
+    nose.tools.assert_equals(watertxt.get_parameter(actual, name = "Subsurface Flow")["mean"], 50.0)
+    nose.tools.assert_equals(watertxt.get_parameter(watertxt.open_mmap(filepath), name = "Discharge")["mean"], 6.0)
+
+@with_setup(setup, teardown) 
+def test_iter_chunks_in():
+
+    chunks = list(watertxt.iter_chunks_in(filestream = StringIO(fixture["data_file_clean"]), chunk_rows = 2))
+
+    header = chunks[0]
+
+    nose.tools.assert_equals(header["user"], "jlant")
+    nose.tools.assert_equals(header["stationid"], "012345")
+    nose.tools.assert_equals(header["column_names"], fixture["sample_data_dict"]["column_names"])
+
+    # 3 data rows in chunks of 2 rows
+    nose.tools.assert_equals(len(chunks), 3)
+    nose.tools.assert_equals(chunks[1][1].shape, (2, 14))
+    nose.tools.assert_equals(chunks[2][1].shape, (1, 14))
+
+    np.testing.assert_equal(np.concatenate([chunks[1][0], chunks[2][0]]), fixture["sample_data_dict"]["dates"])
+
+    for i, values in enumerate(watertxt.get_all_values(watertxt_data = fixture["sample_data_dict"])):
+        np.testing.assert_equal(np.concatenate([chunks[1][1][:, i], chunks[2][1][:, i]]), values)
+
+@with_setup(setup, teardown) 
+def test_write_chunks():
+
+    wateruse_totals = {"January": 2.0, "February": 2.0, "March": 2.0, "April": 3.0, "May": 3.0, "June": 0.0, 
+                       "July": 4.0, "August": 4.0, "September": 4.0, "October": 5.0, "November": 5.0, "December": 5.0}
+
+    # apply water use and factors to the whole file
+    data = watertxt.read_file_in(filestream = StringIO(fixture["data_file_clean"]))
+    data = watertxt.apply_wateruse(watertxt_data = data, wateruse_totals = wateruse_totals)
+    data = watertxt.apply_factors(watertxt_data = data, name = "PET", factors = wateruse_totals)
+    watertxt.write_file(watertxt_data = data, save_path = os.path.join(os.getcwd(), "tests"), filename = "_WATER-whole-file.txt")
+
+    # apply water use and factors one chunk at a time
+    chunks = watertxt.iter_chunks_in(filestream = StringIO(fixture["data_file_clean"]), chunk_rows = 2)
+    chunks = watertxt.apply_wateruse_chunks(chunks = chunks, wateruse_totals = wateruse_totals)
+    chunks = watertxt.apply_factors_chunks(chunks = chunks, name = "PET", factors = wateruse_totals)
+    watertxt.write_chunks(chunks = chunks, save_path = os.path.join(os.getcwd(), "tests"), filename = "_WATER-chunks.txt")
+
+    with open(os.path.join(os.getcwd(), "tests", "_WATER-whole-file.txt"), "r") as f:
+        expected = f.read()
+
+    with open(os.path.join(os.getcwd(), "tests", "_WATER-chunks.txt"), "r") as f:
+        actual = f.read()
+
+    nose.tools.assert_equals(actual, expected)
+
 @with_setup(setup, teardown) 
 def test_write_timeseries_file1():
     """ Test write_timeseries_file functionality part 1 - Discharge with only and no file name """
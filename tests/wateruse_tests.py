@@ -5,6 +5,7 @@ from StringIO import StringIO
 
 # my module
 from waterapputils.modules import wateruse
+from waterapputils.modules import helpers
 
 # define the global fixture to hold the data that goes into the functions you test
 fixture = {}
@@ -307,6 +308,34 @@ def test_get_wateruse_values3():
     # assert equality
     _perform_assertion(actual, expected, description = description)  
 
+def test_create_wateruse_table():
+    """ Test create_wateruse_table() """    
+
+    # description of test        
+    description = "Test create_wateruse_table() - test storing water use values in a 2-D array with an index of the rows of the ids (hydroids)"     
+
+    # expected values to test with actual values
+    expected = {"wateruse_types": ["AqGwWL", "CoGwWL", "DoGwWL", "InGwWL", "IrGwWL"],
+                "index": {"256": 0, "241": 1, "222": 2, "220": 3, "12": 4, "11": 5, "8": 6},
+                "values": np.array([[2.0, 5.0, 2.0, 5.0, -2.0], [4.0, 3.0, 4.0, 3.0, -4.0], [6.0, 4.0, 6.0, 4.0, -6.0], [3.0, 8.0, 3.0, 8.0, -8.0],
+                                    [1.0, 3.0, 1.0, 3.0, -1.0], [2.0, 6.0, 2.0, 6.0, -1.0], [2.0, 1.0, 2.0, 1.0, -1.0]]),
+                "ids_256_241_222_220_with_factors": [[4.0, 15.0, 8.0, 25.0, -12.0], [8.0, 9.0, 16.0, 15.0, -24.0], [12.0, 12.0, 24.0, 20.0, -36.0], [6.0, 24.0, 12.0, 40.0, -48.0]],
+                "total_ids_12_11_8_with_factors": {"January": 92.0, "February": 92.0, "March": 92.0}
+    }
+
+    # actual values       
+    wateruse_table = wateruse.create_wateruse_table(wateruse_data = fixture["wateruse_data"])
+
+    actual = {}
+    actual["wateruse_types"] = wateruse_table["wateruse_types"]
+    actual["index"] = wateruse_table["index"]
+    actual["values"] = wateruse_table["values"]
+    actual["ids_256_241_222_220_with_factors"] = wateruse.get_wateruse_values(wateruse_data = wateruse_table, id_list = ["256", "241", "222", "220"], wateruse_factors = fixture["wateruse_factors_variable"])
+    actual["total_ids_12_11_8_with_factors"] = wateruse.get_total_wateruse(wateruse_data = wateruse_table, id_list = ["12", "11", "8"], wateruse_factors = fixture["wateruse_factors_variable"])
+
+    # assert equality
+    _perform_assertion(actual, expected, description = description)  
+
 def test_sum_values1():
     """ Test sum_values() part 1 - ids [256, 241, 222, 220] """
 
@@ -709,4 +738,86 @@ def test_get_all_total_wateruse6():
     actual = _get_all_total_wateruse_for_tests(wateruse_files = wateruse_files_list, id_list = ["256", "241", "222", "220"], wateruse_factor_file = wateruse_factor_file, in_cfs = True)  
 
     # assert equality
-    _perform_assertion(actual, expected, description = description, do_almost_equal = True)
\ No newline at end of file
+    _perform_assertion(actual, expected, description = description, do_almost_equal = True)
+
+def test_wateruse_dataset():
+    """ Test WaterUseDataset - ids [256, 241, 222, 220] and [12, 11, 8] WITH water use factors """
+
+    # description of test        
+    description = "Test WaterUseDataset : test getting the total sum of water use for 2 lists of ids (hydroids) from water use files and a factor file that are read once, WITH water use factors that are VARIABLE in CFS"     
+
+    wateruse_files_list = [fixture["data_file_JFM"], fixture["data_file_AMJ"], fixture["data_file_JAS"], fixture["data_file_OND"]]
+
+    # expected values to test with actual values
+    expected = {}
+    expected["ids_256_241_222_220"] = _get_all_total_wateruse_for_tests(wateruse_files = wateruse_files_list, id_list = ["256", "241", "222", "220"], wateruse_factor_file = fixture["factor_file_variable"], in_cfs = True)
+    expected["ids_12_11_8"] = _get_all_total_wateruse_for_tests(wateruse_files = wateruse_files_list, id_list = ["12", "11", "8"], wateruse_factor_file = fixture["factor_file_variable"], in_cfs = True)
+
+    # actual values       
+    wateruse_data_list = [wateruse.read_file_in(StringIO(wateruse_file)) for wateruse_file in wateruse_files_list]
+    wateruse_factors = wateruse.read_factor_file_in(StringIO(fixture["factor_file_variable"]))
+
+    wateruse_dataset = wateruse.WaterUseDataset(wateruse_data_list = wateruse_data_list, wateruse_factors = wateruse_factors)
+
+    actual = {}
+    actual["ids_256_241_222_220"] = wateruse_dataset.get_all_total_wateruse(id_list = ["256", "241", "222", "220"], in_cfs = True)
+    actual["ids_12_11_8"] = wateruse_dataset.get_all_total_wateruse(id_list = ["12", "11", "8"], in_cfs = True)
+
+    # assert equality
+    _perform_assertion(actual, expected, description = description) 
+
+def test_get_basins_total_wateruse():
+    """ Test WaterUseDataset.get_basins_total_wateruse() - all the basins at once """
+
+    # description of test        
+    description = "Test WaterUseDataset.get_basins_total_wateruse() : test getting the total sum of water use of 3 basins at once, WITH water use factors that are VARIABLE in CFS"     
+
+    wateruse_files_list = [fixture["data_file_JFM"], fixture["data_file_AMJ"], fixture["data_file_JAS"], fixture["data_file_OND"]]
+    intersecting_centroids = {"1": ["256", "241", "222", "220"], "0": ["12", "11", "8"], "2": ["256"]}
+
+    wateruse_data_list = [wateruse.read_file_in(StringIO(wateruse_file)) for wateruse_file in wateruse_files_list]
+    wateruse_factors = wateruse.read_factor_file_in(StringIO(fixture["factor_file_variable"]))
+
+    wateruse_dataset = wateruse.WaterUseDataset(wateruse_data_list = wateruse_data_list, wateruse_factors = wateruse_factors)
+
+    # expected values to test with actual values; one basin at a time
+    expected = {"featureids": ["0", "1", "2"], "months": ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]}
+    expected["totals"] = np.array([helpers.convert_monthly_dict_to_array(monthly_dict = wateruse_dataset.get_all_total_wateruse(id_list = intersecting_centroids[featureid], in_cfs = True)) for featureid in expected["featureids"]])
+
+    # actual values       
+    actual = {}
+    actual["featureids"], actual["months"], actual["totals"] = wateruse_dataset.get_basins_total_wateruse(intersecting_centroids = intersecting_centroids, in_cfs = True)
+
+    # assert equality
+    _perform_assertion(actual = {"totals": actual["totals"]}, expected = expected, description = description, do_almost_equal = True) 
+    _perform_assertion(actual = {"featureids": actual["featureids"], "months": actual["months"]}, expected = expected, description = description) 
+
+def test_get_basins_total_wateruse_nan():
+    """ Test WaterUseDataset.get_basins_total_wateruse() - a nan water use value keeps its months """
+
+    # description of test        
+    description = "Test WaterUseDataset.get_basins_total_wateruse() : test that a nan water use value gives nan totals for its months instead of leaving the months out"     
+
+    wateruse_files_list = [fixture["data_file_JFM"], fixture["data_file_AMJ"]]
+    intersecting_centroids = {"1": ["256", "241"], "0": ["12", "11", "8"]}
+
+    wateruse_data_list = [wateruse.read_file_in(StringIO(wateruse_file)) for wateruse_file in wateruse_files_list]
+
+    # a bad or missing water use value is nan; see helpers.convert_to_float()
+    wateruse_data_list[0]["AqGwWL"][wateruse_data_list[0]["newhydroid"].index("256")] = np.nan
+
+    wateruse_dataset = wateruse.WaterUseDataset(wateruse_data_list = wateruse_data_list)
+
+    # actual values       
+    featureids, months, totals = wateruse_dataset.get_basins_total_wateruse(intersecting_centroids = intersecting_centroids, in_cfs = True)
+
+    # expected values; one basin at a time 
+    for featureid, monthly_totals in zip(featureids, totals):
+        actual = dict(zip(months, monthly_totals.tolist()))
+        expected = wateruse_dataset.get_all_total_wateruse(id_list = intersecting_centroids[featureid], in_cfs = True)
+
+        # assert equality
+        _perform_assertion(actual = {"months": sorted(actual.keys())}, expected = {"months": sorted(expected.keys())}, description = description) 
+        _perform_assertion(actual, expected, description = description, do_almost_equal = True) 
+
+    _perform_assertion(actual = {"nan": np.isnan(totals[featureids.index("1"), :3]).all()}, expected = {"nan": True}, description = description) 
@@ -2,10 +2,12 @@ import nose.tools
 import sys
 import numpy as np
 import datetime
+import os
 from StringIO import StringIO
 
 # my module
 from waterapputils.modules import waterxml
+from waterapputils.modules import helpers
 
 # define the global fixture to hold the data that goes into the functions you test
 fixture = {}
@@ -490,6 +492,94 @@ def test_get_xml_data():
     np.testing.assert_equal(actual_simulation, expected_simulation)
 
 
+def test_read_xml_data():
+    """ Test read_xml_data against get_xml_data """
+
+    for data_file, xml_tree in [("data_file1", "xml_tree1"), ("data_file2", "xml_tree2")]:
+        expected_project, expected_study, expected_simulation = waterxml.get_xml_data(waterxml_tree = fixture[xml_tree])
+
+        actual_project, actual_study, actual_simulation = waterxml.read_xml_data(filepath = StringIO(fixture[data_file]))
+
+        np.testing.assert_equal(actual_project, expected_project)
+        np.testing.assert_equal(actual_study, expected_study)
+
+        for key in ["SimulID", "StudyID", "RegionType", "SimulationFeatures", "SimulationTopographicWetnessIndex"]:
+            np.testing.assert_equal(actual_simulation[key], expected_simulation[key])
+
+        # timeseries values are stored in arrays
+        for key in ["StudyUnitDischargeSeries", "ClimaticPrecipitationSeries", "ClimaticTemperatureSeries"]:
+            expected_dates, expected_values, expected_units = waterxml.get_timeseries_data(simulation_dict = expected_simulation, timeseries_key = key)
+            actual_dates, actual_values, actual_units = waterxml.get_timeseries_data(simulation_dict = actual_simulation, timeseries_key = key)
+
+            nose.tools.assert_equals(len(actual_dates), len(expected_dates))
+            nose.tools.assert_equals(actual_units, expected_units)
+
+            for i in range(len(expected_dates)):
+                np.testing.assert_equal(actual_dates[i], expected_dates[i])
+                np.testing.assert_equal(actual_values[i], expected_values[i])
+
+def test_series_buffer():
+
+    series_buffer = waterxml.create_series_buffer(units = "mm", size = 1)
+
+    for date_str, value in [("2014-01-01", "3.0"), ("2014-01-02", "4.5"), ("2014-01-03", "-1")]:
+        waterxml.append_series_value(series_buffer = series_buffer, date_str = date_str, value = value)
+
+    actual = waterxml.get_series_buffer_data(series_buffer = series_buffer)
+
+    np.testing.assert_equal(actual["dates"], np.array([datetime.datetime(2014, 1, 1, 0, 0), datetime.datetime(2014, 1, 2, 0, 0), datetime.datetime(2014, 1, 3, 0, 0)]))
+    np.testing.assert_equal(actual["values"], np.array([3.0, 4.5, -1.0]))
+    nose.tools.assert_equals(actual["units"], "mm")
+
+def test_deduplicate_timeseries():
+
+    project, study, simulation = waterxml.read_xml_data(filepath = StringIO(fixture["data_file2"]))
+
+    # both SimulID's share the same arrays; all the timeseries share the same dates
+    for key in ["StudyUnitDischargeSeries", "ClimaticPrecipitationSeries", "ClimaticTemperatureSeries"]:
+        dates, values, units = waterxml.get_timeseries_data(simulation_dict = simulation, timeseries_key = key)
+
+        nose.tools.assert_true(values[0] is values[1])
+        nose.tools.assert_true(dates[0] is simulation["StudyUnitDischargeSeries"][0]["dates"])
+        nose.tools.assert_false(values[0].flags.writeable)
+
+    project, study, simulation = waterxml.read_xml_data(filepath = StringIO(fixture["data_file2"]), deduplicate = False)
+
+    nose.tools.assert_false(simulation["ClimaticPrecipitationSeries"][0]["values"] is simulation["ClimaticPrecipitationSeries"][1]["values"])
+
+def test_write_xml_data():
+
+    filepath = os.path.join(os.getcwd(), "tests", "_WATERSimulation-original.xml")
+    with open(filepath, "w") as f:
+        f.write(fixture["data_file2"])
+
+    project, study, simulation = waterxml.read_xml_data(filepath = filepath)
+
+    # unchanged values write the same file
+    waterxml.write_xml_data(filepath = filepath, simulation_dict = simulation, save_path = os.path.join(os.getcwd(), "tests"), filename = "_WATERSimulation-same.xml", block_size = 100)
+
+    with open(os.path.join(os.getcwd(), "tests", "_WATERSimulation-same.xml"), "r") as f:
+        nose.tools.assert_equals(f.read(), fixture["data_file2"])
+
+    # changed values of the shared arrays are expanded to every SimulID
+    new_values = simulation["ClimaticPrecipitationSeries"][0]["values"] * 2
+    for timeseries in simulation["ClimaticPrecipitationSeries"]:
+        timeseries["values"] = new_values
+
+    waterxml.write_xml_data(filepath = filepath, simulation_dict = simulation, save_path = os.path.join(os.getcwd(), "tests"), filename = "_WATERSimulation-new.xml", block_size = 100)
+
+    expected_project, expected_study, expected_simulation = waterxml.read_xml_data(filepath = StringIO(fixture["data_file2"]))
+    actual_project, actual_study, actual_simulation = waterxml.read_xml_data(filepath = os.path.join(os.getcwd(), "tests", "_WATERSimulation-new.xml"))
+
+    np.testing.assert_equal(actual_project, expected_project)
+
+    for key in ["StudyUnitDischargeSeries", "ClimaticTemperatureSeries"]:
+        for i in range(len(expected_simulation["SimulID"])):
+            np.testing.assert_equal(actual_simulation[key][i]["values"], expected_simulation[key][i]["values"])
+
+    for i in range(len(expected_simulation["SimulID"])):
+        np.testing.assert_equal(actual_simulation["ClimaticPrecipitationSeries"][i]["values"], np.array([6.0, 9.0]))
+
 def test_get_topographic_wetness_index_data_file1():
 
     expected = {"bin_ids": [np.array([1., 2.])],
@@ -714,4 +804,168 @@ def test_change_element_value():
     actual_project = waterxml.fill_dict(waterxml_tree = fixture["xml_tree1"], data_dict = project_updated, element = "Project", keys = project.keys())
 
     # print results
-    np.testing.assert_equal(actual_project, expected_project) 
\ No newline at end of file
+    np.testing.assert_equal(actual_project, expected_project) 
+
+def test_rewrite_file():
+    """ Test streaming factors and a new project name against the xml tree functions """
+
+    filepath = os.path.join(os.getcwd(), "tests", "_WATERSimulation-original.xml")
+    with open(filepath, "w") as f:
+        f.write(fixture["data_file2"])
+
+    project_name = waterxml.get_element_text(filepath = filepath, element = "Project", child = "ProjName")
+
+    waterxml.rewrite_file(filepath = filepath, save_path = os.path.join(os.getcwd(), "tests"), filename = "_WATERSimulation-rewrite.xml", 
+                          element_factors = {"ClimaticPrecipitationSeries": fixture["factors"], "ClimaticTemperatureSeries": fixture["factors"]},
+                          element_values = {"Project": {"ProjName": "-".join(["updated", project_name])}},
+                          block_size = 100)
+
+    waterxml.apply_factors(waterxml_tree = fixture["xml_tree2"], element = "ClimaticPrecipitationSeries", factors = fixture["factors"])
+    waterxml.apply_factors(waterxml_tree = fixture["xml_tree2"], element = "ClimaticTemperatureSeries", factors = fixture["factors"])
+    waterxml.change_element_value(waterxml_tree = fixture["xml_tree2"], element = "Project", child = "ProjName" , new_value = "-".join(["updated", project_name]))
+
+    expected_tree = fixture["xml_tree2"]
+    actual_tree = waterxml.read_file(os.path.join(os.getcwd(), "tests", "_WATERSimulation-rewrite.xml"))
+
+    nose.tools.assert_equals([elem.tag for elem in actual_tree.iter()], [elem.tag for elem in expected_tree.iter()])
+    nose.tools.assert_equals([elem.text for elem in actual_tree.iter()], [elem.text for elem in expected_tree.iter()])
+    nose.tools.assert_equals(actual_tree.find("ProjName").text, "updated-my-project")
+
+def test_rewrite_file_element_values():
+    """ Test that only the children of the parent element get new values """
+
+    filepath = os.path.join(os.getcwd(), "tests", "_WATERSimulation-values.xml")
+    with open(filepath, "w") as f:
+        f.write('<Project>\n<ProjName id="1" >my-project</ProjName >\n<Study>\n<ProjName>study-name</ProjName>\n<StudyDescription/>\n</Study>\n</Project>\n')
+
+    nose.tools.assert_equals(waterxml.get_element_text(filepath = filepath, element = "Project", child = "ProjName"), "my-project")
+    nose.tools.assert_equals(waterxml.get_element_text(filepath = filepath, element = "Study", child = "StudyDescription"), "")
+    nose.tools.assert_equals(waterxml.get_element_text(filepath = filepath, element = "Study", child = "StudyID"), None)
+
+    waterxml.rewrite_file(filepath = filepath, save_path = os.path.join(os.getcwd(), "tests"), filename = "_WATERSimulation-values-rewrite.xml", 
+                          element_values = {"Project": {"ProjName": "updated-my-project"}, "Study": {"StudyDescription": "a & b"}},
+                          block_size = 10)
+
+    with open(os.path.join(os.getcwd(), "tests", "_WATERSimulation-values-rewrite.xml"), "r") as f:
+        actual = f.read()
+
+    nose.tools.assert_equals(actual, '<Project>\n<ProjName id="1" >updated-my-project</ProjName>\n<Study>\n<ProjName>study-name</ProjName>\n<StudyDescription>a &amp; b</StudyDescription>\n</Study>\n</Project>\n')
+
+    # an element that is not found is an error and no output file is left behind
+    nose.tools.assert_raises(ValueError, waterxml.rewrite_file, filepath, os.path.join(os.getcwd(), "tests"), "_WATERSimulation-values-missing.xml", None, {"Study": {"StudyID": "1"}})
+    nose.tools.assert_false(os.path.isfile(os.path.join(os.getcwd(), "tests", "_WATERSimulation-values-missing.xml")))
+
+def test_set_backend():
+    """ Test that every installed xml backend gives the same results """
+
+    expected_project, expected_study, expected_simulation = waterxml.get_xml_data(waterxml_tree = waterxml.read_file(StringIO(fixture["data_file2"])))
+
+    default_backend = waterxml.BACKEND
+    for name in waterxml.XML_BACKENDS:
+        try:
+            nose.tools.assert_equals(waterxml.set_backend(name = name), name)
+        except ImportError:
+            continue
+
+        actual_project, actual_study, actual_simulation = waterxml.get_xml_data(waterxml_tree = waterxml.read_file(StringIO(fixture["data_file2"])))
+
+        nose.tools.assert_equals(actual_project, expected_project)
+        nose.tools.assert_equals(actual_study, expected_study)
+        nose.tools.assert_equals(actual_simulation, expected_simulation)
+
+        project, study, simulation = waterxml.read_xml_data(filepath = StringIO(fixture["data_file2"]))
+
+        nose.tools.assert_equals(project, expected_project)
+        np.testing.assert_equal(simulation["ClimaticTemperatureSeries"][1]["values"], np.array([11.1, 12.2]))
+
+    waterxml.set_backend(name = default_backend)
+
+    nose.tools.assert_raises(ValueError, waterxml.set_backend, "expat")
+
+def test_write_file_backends():
+    """ Test that every installed xml backend writes the same bytes for a file with attributes and empty elements """
+
+    data_file = '<?xml version="1.0" standalone="yes"?>\n<Project Version="2" Source="WATER">\n<ProjID>1</ProjID>\n<ProjName>my-project</ProjName>\n<Study>\n<StudyID units="none" id="1">1</StudyID>\n<StudyNotes />\n<StudyDescription/>\n</Study>\n</Project>\n'
+
+    expected = '<Project Source="WATER" Version="2">\n<ProjID>1</ProjID>\n<ProjName>my-project</ProjName>\n<Study>\n<StudyID id="1" units="none">1</StudyID>\n<StudyNotes />\n<StudyDescription />\n</Study>\n</Project>'
+
+    default_backend = waterxml.BACKEND
+    for name in waterxml.XML_BACKENDS:
+        try:
+            waterxml.set_backend(name = name)
+        except ImportError:
+            continue
+
+        waterxml.write_file(waterxml_tree = waterxml.read_file(StringIO(data_file)), save_path = os.path.join(os.getcwd(), "tests"), filename = "_WATERSimulation-backend.xml")
+
+        with open(os.path.join(os.getcwd(), "tests", "_WATERSimulation-backend.xml"), "rb") as f:
+            actual = f.read()
+
+        nose.tools.assert_equals(actual, expected, "backend {} wrote {!r}".format(name, actual))
+
+    waterxml.set_backend(name = default_backend)
+
+def test_export_columnar():
+    """ Test that load_columnar gives the data of the xml tree that export_columnar exported """
+
+    for xml_tree in ["xml_tree1", "xml_tree2"]:
+        filepath = os.path.join(os.getcwd(), "tests", "_{}.npz".format(xml_tree))
+
+        waterxml.export_columnar(waterxml_tree = fixture[xml_tree], filepath = filepath)
+
+        expected_project, expected_study, expected_simulation = waterxml.get_xml_data(waterxml_tree = fixture[xml_tree])
+        actual_project, actual_study, actual_simulation = waterxml.load_columnar(filepath = filepath)
+
+        nose.tools.assert_equals(actual_project, expected_project)
+        nose.tools.assert_equals(actual_study, expected_study)
+
+        for key in ["SimulID", "StudyID", "RegionType", "SimulationFeatures", "SimulationTopographicWetnessIndex"]:
+            nose.tools.assert_equals(actual_simulation[key], expected_simulation[key])
+
+        for key in ["StudyUnitDischargeSeries", "ClimaticPrecipitationSeries", "ClimaticTemperatureSeries"]:
+            expected_dates, expected_values, expected_units = waterxml.get_timeseries_data(simulation_dict = expected_simulation, timeseries_key = key)
+            actual_dates, actual_values, actual_units = waterxml.get_timeseries_data(simulation_dict = actual_simulation, timeseries_key = key)
+
+            nose.tools.assert_equals(actual_units, expected_units)
+            np.testing.assert_equal(actual_dates, expected_dates)
+            np.testing.assert_equal(actual_values, expected_values)
+
+def test_read_columnar():
+    """ Test that read_columnar writes a columnar file next to the xml file and reads it afterwards """
+
+    filepath = os.path.join(os.getcwd(), "tests", "_WATERSimulation-columnar.xml")
+    with open(filepath, "w") as f:
+        f.write(fixture["data_file1"])
+
+    expected_project, expected_study, expected_simulation = waterxml.read_columnar(filepath = filepath)
+
+    nose.tools.assert_true(os.path.isfile(waterxml.get_columnar_path(filepath = filepath)))
+
+    actual_project, actual_study, actual_simulation = waterxml.read_columnar(filepath = filepath)
+
+    nose.tools.assert_equals(actual_project, expected_project)
+    nose.tools.assert_equals(actual_simulation["SimulationFeatures"], expected_simulation["SimulationFeatures"])
+    np.testing.assert_equal(actual_simulation["ClimaticTemperatureSeries"][0]["values"], np.array([11.1, 12.2]))
+
+    # a changed xml file is parsed again even when its modification time is older
+    stat = os.stat(filepath)
+    with open(filepath, "w") as f:
+        f.write(fixture["data_file1"].replace("<SeriesValue>11.1</SeriesValue>", "<SeriesValue>99.9</SeriesValue>"))
+    os.utime(filepath, (stat.st_atime, stat.st_mtime - 60))
+
+    actual_project, actual_study, actual_simulation = waterxml.read_columnar(filepath = filepath)
+
+    np.testing.assert_equal(actual_simulation["ClimaticTemperatureSeries"][0]["values"], np.array([99.9, 12.2]))
+
+    # a truncated columnar file is parsed again and rewritten
+    columnar_path = waterxml.get_columnar_path(filepath = filepath)
+    with open(columnar_path, "rb") as f:
+        text = f.read()
+    with open(columnar_path, "wb") as f:
+        f.write(text[:len(text) // 2])
+
+    actual_project, actual_study, actual_simulation = waterxml.read_columnar(filepath = filepath)
+
+    np.testing.assert_equal(actual_simulation["ClimaticTemperatureSeries"][0]["values"], np.array([99.9, 12.2]))
+    expected_key = helpers.get_file_key(filepath = filepath)
+    nose.tools.assert_equals(waterxml.load_columnar_key(filepath = columnar_path), {"size": expected_key["size"], "md5": expected_key["md5"]})
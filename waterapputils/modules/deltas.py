@@ -85,57 +85,258 @@ def read_file_in(filestream):
             
     }         
     """ 
-    # read all the lines in the filestream
-    data_file = filestream.readlines()
+    # read the columns of the file into arrays and convert the arrays to lists of values
+    data = convert_columns_to_lists(columns = read_columns_in(filestream))
+
+    # return data
+    return data
+
+def read_columns(filename):
+    """    
+    Open delta \*.txt file, create a file object for read_columns_in(filestream) to process.
+    
+    Parameters
+    ----------
+    filename : string
+        String path of a delta data file
+        
+    Returns
+    -------
+    columns : dictionary 
+        Returns a dictionary containing columns of data found in data file. 
+
+    See Also
+    --------
+    read_columns_in : Read data file object into columns
+    """
+    filestream = open(filename, "r")
+    columns = read_columns_in(filestream)
+    filestream.close()
     
+    return columns
+
+def read_columns_in(filestream):
+    """    
+    Read a delta \*.txt file in one pass into columns of numpy arrays; each data row is 
+    split once and each month column is converted to floats at once. Returns a dictionary 
+    with keys named as the column header names found in the file, like read_file_in(), 
+    but with arrays of tiles and values.
+        
+    Parameters
+    ----------
+    filestream : file object
+        A python file object that contains an open data file.
+        
+    Returns
+    -------
+    columns : dictionary 
+        Returns a dictionary containing columns of data found in data file. 
+
+    Notes
+    -----          
+    columns = {
+        
+        "Model": string of model name,
+        
+        "Scenario": string of scenario name,
+        
+        "Target": string of scenario name,
+        
+        "Variable": string of variable name,
+        
+        "Tile": numpy array of string tile numbers,
+        
+        "January": numpy array of float delta values for each tile
+        
+        . . .
+        
+        "December": numpy array of float delta values for each tile
+            
+    }         
+
+    Missing or bad values of a month column are converted with helpers.convert_to_float(),
+    so they are logged and replaced with nan like in read_file_in().
+    """ 
     # regular expression patterns in data file
     patterns = {
-        "column_names": "(Model.+)",
-        "data_row": "([a-zA-z0-9-]+)\t(\w+)\t(\d+)\t(.+)"
+        "column_names": re.compile("(Model.+)"),
+        "data_row": re.compile("([a-zA-z0-9-]+)\t(\w+)\t(\d+)\t(.+)")
     }        
 
-   # initialize a temporary dictionary to hold data of interest
-    initial_data = {"column_names": None, "parameters": []}      
+    # split each data row once after the column names are found
+    column_names = None
+    rows = []
+    for line in filestream:
+        if column_names is None:
+            match_column_names = patterns["column_names"].search(line)
+            if match_column_names:
+                column_names = match_column_names.group(0).split("\t") 
+            continue
 
-    # process file
-    for line in data_file:     
-        match_column_names = re.search(pattern = patterns["column_names"], string = line)
-        match_data_row = re.search(pattern = patterns["data_row"], string = line)
-     
-        # if match is found add it to data dictionary
-        if match_column_names:
-            initial_data["column_names"] = match_column_names.group(0).split("\t") 
-            
-            for name in initial_data["column_names"]:
-                initial_data["parameters"].append({"name": name, "index": initial_data["column_names"].index(name), "data": []})
-                
+        match_data_row = patterns["data_row"].search(line)
         if match_data_row:
-            for parameter in initial_data["parameters"]:
-                value = match_data_row.group(0).split("\t")[parameter["index"]] 
-                parameter["data"].append(value)
-                
-                
+            rows.append(match_data_row.group(0).split("\t"))
+
+    if column_names is None:
+        return {}
+
     # format data into a dictionary; remove duplicate text values from certain column_names, and dynamically create keys with column names
-    data = {}
+    columns = {}
     duplicate_value_columns = ["Model", "Scenario", "Target", "Variable"]
 
-    for parameter in initial_data["parameters"]:
-        if parameter["name"] in duplicate_value_columns:
-            parameter["data"] = parameter["data"][0]                        # duplicate values, so just get first value
-        elif parameter["name"] == "Tile":
-            pass                                                            # leave Tile values as strings
+    # transpose the rows into the values of each column
+    column_values = zip(*rows)
+
+    for name in column_names:
+        index = column_names.index(name)
+        values = list(column_values[index]) if column_values else []
+
+        if name in duplicate_value_columns:
+            columns[name] = values[0] if values else []                    # duplicate values, so just get first value
+        elif name == "Tile":
+            columns[name] = np.array(values, dtype = str)                   # leave Tile values as strings
         else:
-            for i in range(len(parameter["data"])):                         # ensure that value is a float
-                value = helpers.convert_to_float(value = parameter["data"][i], helper_str = "parameter {}".format(parameter["name"]))                
-                                       
-                parameter["data"][i] = float(value)
+            columns[name] = convert_to_floats(values = values, name = name)
+
+    return columns
+
+def convert_columns_to_lists(columns):
+    """    
+    Convert the arrays of a dictionary of columns from read_columns_in() to lists 
+    of values like the dictionary returned by read_file_in(); the dictionary is 
+    changed in place.
         
-        # populate data dictionary with clean data sets
-        data[parameter["name"]] = parameter["data"]
-            
-    # return data
-    return data
+    Parameters
+    ----------
+    columns : dictionary 
+        Dictionary containing columns of data found in a delta data file
+        
+    Returns
+    -------
+    columns : dictionary 
+        Dictionary containing lists of data found in a delta data file
+    """ 
+    for name, values in columns.items():
+        if isinstance(values, np.ndarray):
+            columns[name] = values.tolist()
+
+    return columns
+
+def convert_to_floats(values, name):
+    """    
+    Convert a list of string values of a column to an array of floats. Values are 
+    converted at once when all of them are numbers; otherwise only the values that are
+    not numbers are converted with helpers.convert_to_float(), so they are logged and 
+    replaced with nan.
+        
+    Parameters
+    ----------
+    values : list
+        List of string values
+    name : string
+        String name of the column of the values; used in error log messages
+        
+    Returns
+    -------
+    array : numpy array
+        Array of float values
+    """ 
+    try:
+        return np.array(values, dtype = float)
+    except ValueError:
+        pass
+
+    array = np.empty(len(values))
+    for i, value in enumerate(values):
+        try:
+            array[i] = float(value)
+        except ValueError:
+            array[i] = helpers.convert_to_float(value = value, helper_str = "parameter {}".format(name))
+
+    return array
        
+def create_delta_table(deltas_data):
+    """   
+    Create a delta table from delta data; the monthly delta values of all the tiles are 
+    stored in a 2-D array with a row for each tile, and a dictionary index holds the 
+    row of each tile.
+    
+    Parameters
+    ----------
+    deltas_data : dictionary 
+        Dictionary holding data from a delta data file; either lists from read_file() or 
+        arrays from read_columns()
+        
+    Returns
+    -------
+    delta_table : dictionary
+        Dictionary holding the delta table
+
+    Notes
+    -----
+    delta_table = {
+    
+        "Model": string of model name,
+        
+        "Scenario": string of scenario name,
+        
+        "Target": string of scenario name,
+        
+        "Variable": string of variable name,
+
+        "Tile": list of string tiles; the rows of the values,
+
+        "index": dictionary of string tiles and the row of each tile,
+
+        "values": 2-D numpy array of float delta values; shape is n x 12 where n is number of tiles
+
+    }
+
+    If a tile is in the delta data more than once, the index holds the first row of the tile.
+    """
+    month_list = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]       
+
+    tiles = deltas_data["Tile"]
+    if isinstance(tiles, np.ndarray):
+        tiles = tiles.tolist()
+
+    index = {}
+    for row, tile in enumerate(tiles):
+        index.setdefault(tile, row)
+
+    values = np.zeros((len(tiles), len(month_list)), dtype = float)
+    for column, month in enumerate(month_list):
+        values[:, column] = deltas_data[month]
+
+    delta_table = {"Model": deltas_data.get("Model"), 
+                   "Scenario": deltas_data.get("Scenario"), 
+                   "Target": deltas_data.get("Target"), 
+                   "Variable": deltas_data.get("Variable"), 
+                   "Tile": tiles, 
+                   "index": index, 
+                   "values": values}
+
+    return delta_table
+
+def get_delta_table(deltas_data):
+    """   
+    Get the delta table of delta data. 
+    
+    Parameters
+    ----------
+    deltas_data : dictionary 
+        Dictionary holding data from a delta data file, or a delta table from create_delta_table()
+        
+    Returns
+    -------
+    delta_table : dictionary
+        Dictionary holding the delta table
+    """
+    if "index" in deltas_data and "values" in deltas_data:
+        return deltas_data
+
+    return create_delta_table(deltas_data = deltas_data)
+
 def get_monthly_values(delta_data, tile_list):
     """   
     Get monthly values based on tile(s) of interest.
@@ -157,17 +358,12 @@ def get_monthly_values(delta_data, tile_list):
     values = [[  1.3   2.7   3.3   4.7   5.3   6.7   7.3   8.7   9.3  10.7  11.3  12.7]
               [  1.2   2.8   3.2   4.8   5.2   6.8   7.2   8.8   9.2  10.8  11.2  12.8]]
     """
-    month_list = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]       
+    delta_table = get_delta_table(deltas_data = delta_data)
+
     values = []
     for tile in tile_list:
-        if tile in delta_data["Tile"]:
-            monthly_values = []
-            tile_index = delta_data["Tile"].index(tile)
-            for month in month_list:
-                value = delta_data[month][tile_index]
-                monthly_values.append(value)
-                
-            values.append(monthly_values)
+        if tile in delta_table["index"]:
+            values.append(delta_table["values"][delta_table["index"][tile]].tolist())
 
         else: 
             logging.warn("{} tile is not in the tile list contained in delta_data.".format(tile)) 
@@ -278,26 +474,26 @@ def calculate_avg_delta_values(deltas_data, tile_list):
     
     }         
     """ 
+    delta_table = get_delta_table(deltas_data = deltas_data)
+
     # check that each tile in tile list is contained in the deltas_data     
     for tile in tile_list:
-        if tile not in deltas_data["Tile"]:
+        if tile not in delta_table["index"]:
             raise ValueError, "Tile {} is not contined in deltas_data".format(tile)
   
     # initialize avg_delta_values with keys corresponding to variable type  
     avg_delta_values = {}    
-    variable_type = deltas_data["Variable"]
+    variable_type = delta_table["Variable"]
     avg_delta_values[variable_type] = helpers.create_monthly_dict()
     
-    # get delta values that correspond to a list of tiles
-    values = get_monthly_values(deltas_data, tile_list = tile_list)    
-    
-    # format the values into a dictionary containing monthly keys
-    values_dict = format_to_monthly_dict(values)
-    
-    # compute average of delta values for each month and put it in avg_delta_values
-    for key, value in values_dict.iteritems():
-        avg_value = np.average(value)
-        avg_delta_values[variable_type][key] = avg_value
+    # gather the rows of the tiles and compute the average of each month at once; the rows are 
+    # transposed to contiguous months so each mean sums the values of a month like np.average
+    month_list = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]       
+    rows = [delta_table["index"][tile] for tile in tile_list]
+    avg_values = np.ascontiguousarray(delta_table["values"][rows].T).mean(axis = 1)
+
+    for month, avg_value in zip(month_list, avg_values):
+        avg_delta_values[variable_type][month] = avg_value
        
     return avg_delta_values   
 
@@ -323,23 +519,76 @@ def get_deltas(delta_files, tiles):
     See Also
     --------
     calculate_avg_delta_values()
+    DeltaTable : Reuse the delta files of many lists of tiles
+    """
+    delta_table = read_delta_table(delta_files = delta_files)
+
+    return delta_table.get_deltas(tiles = tiles)
+
+def read_delta_table(delta_files):
+    """    
+    Read delta files once into a DeltaTable. The columns of each file are read into 
+    arrays with read_columns() and the delta tables are made from the arrays.
+    
+    Parameters
+    ----------
+    delta_files : list
+        List of delta files; i.e. one file for each variable (Ppt, Tmax, PET)
+        
+    Returns
+    -------
+    delta_table : DeltaTable
+        DeltaTable holding the delta tables of the delta files
     """
-    # calculate average values for a list of delta files
-    deltas_data_all = []
-    deltas_avg = {}
-    for delta_file in delta_files:
-        
-        # read the delta file
-        deltas_data = read_file(delta_file) 
-                
-        # calculate average deltas for a list of tiles
-        avg_delta_values = calculate_avg_delta_values(deltas_data = deltas_data, tile_list = tiles)
-        
-        # update avgerage delta values dictionary 
-        deltas_data_all.append(deltas_data)
-        deltas_avg.update(avg_delta_values)   
-    
-    return deltas_data_all, deltas_avg
+    columns_list = [read_columns(delta_file) for delta_file in delta_files]
+
+    return DeltaTable(deltas_data_list = columns_list)
+
+class DeltaTable(object):
+    """
+    Delta tables of delta data files that are parsed once and reused to get the 
+    average delta values of any number of lists of tiles, such as the tiles of 
+    many basins.
+
+    Parameters
+    ----------
+    deltas_data_list : list
+        List of dictionaries holding data from delta data files, from read_file() or 
+        read_columns(); i.e. one for each variable
+
+    Notes
+    -----
+    Each delta data dictionary is stored as a delta table from create_delta_table(), 
+    so averaging the delta values of a list of tiles is a gather of rows and a 
+    mean of each month.
+
+    The deltas_data_list attribute holds the delta data with lists of values like 
+    read_file(); columns from read_columns() are converted in place when it is used.
+
+    See Also
+    --------
+    read_delta_table : Read delta files into a DeltaTable
+    """
+    def __init__(self, deltas_data_list):
+        self.columns_list = deltas_data_list
+        self.delta_tables = [create_delta_table(deltas_data = deltas_data) for deltas_data in deltas_data_list]
+
+    @property
+    def deltas_data_list(self):
+        """ List of dictionaries holding the delta data with lists of values like read_file() """
+        return [convert_columns_to_lists(columns = columns) for columns in self.columns_list]
+
+    def calculate_avg_delta_values(self, tile_list):
+        """ Get the monthly averaged delta values of a list of tiles for all the delta tables; keys are the variable types """
+        deltas_avg = {}
+        for delta_table in self.delta_tables:
+            deltas_avg.update(calculate_avg_delta_values(deltas_data = delta_table, tile_list = tile_list))
+
+        return deltas_avg
+
+    def get_deltas(self, tiles):
+        """ Get the deltas data and the average delta values of a list of tiles; same as get_deltas() """
+        return self.deltas_data_list, self.calculate_avg_delta_values(tile_list = tiles)
 
     
 def _create_test_data():
@@ -93,11 +93,14 @@ def process_intersecting_tiles(intersecting_tiles, settings, gcm_delta_dir):
     -----
     Uses settings set in user_settings.py 
     """      
+    # read the gcm delta files once for all the featureids
+    delta_table = deltas.read_delta_table(delta_files = settings["gcm_delta_files"])
+
     # create a file for the output  
     for featureid, tiles in intersecting_tiles.iteritems():
 
         # get monthly average gcm delta values
-        deltas_data_list, deltas_avg_dict = deltas.get_deltas(delta_files = settings["gcm_delta_files"], tiles = tiles) 
+        deltas_avg_dict = delta_table.calculate_avg_delta_values(tile_list = tiles)
 
         # print monthly output in nice format to info file
         print("FeatureId: {}\n    Tiles: {}\n    Average GCM Deltas:\n".format(featureid, tiles))  
@@ -125,30 +128,31 @@ def process_intersecting_tiles(intersecting_tiles, settings, gcm_delta_dir):
         # initialize error logging
         waterapputils_logging.initialize_loggers(output_dir = output_dir)
 
-        # read the xml file
-        waterxml_tree = waterxml.read_file(waterxml_file) 
+        # read the txt file; the xml file is streamed when it is written
         watertxt_data = watertxt.read_file(watertxt_file)            
 
         # apply gcm delta
+        element_factors = {}
         for key, value in deltas_avg_dict.iteritems():
             if key == "Ppt":
-                waterxml.apply_factors(waterxml_tree = waterxml_tree, element = "ClimaticPrecipitationSeries", factors = deltas_avg_dict[key])
+                element_factors["ClimaticPrecipitationSeries"] = deltas_avg_dict[key]
 
             elif key == "Tmax":
-                waterxml.apply_factors(waterxml_tree = waterxml_tree, element = "ClimaticTemperatureSeries", factors = deltas_avg_dict[key])
+                element_factors["ClimaticTemperatureSeries"] = deltas_avg_dict[key]
 
             elif key == "PET":
                 watertxt.apply_factors(watertxt_data, name = "PET", factors = deltas_avg_dict[key], is_additive = False)
 
         # update the project name in the updated xml
-        project = waterxml.create_project_dict() 
-        project = waterxml.fill_dict(waterxml_tree = waterxml_tree, data_dict = project, element = "Project", keys = project.keys())
-        waterxml.change_element_value(waterxml_tree = waterxml_tree, element = "Project", child = "ProjName" , new_value = settings["gcm_delta_prepend_name"] + project["ProjName"])
+        project_name = waterxml.get_element_text(filepath = waterxml_file, element = "Project", child = "ProjName")
+        if project_name is None:
+            raise ValueError("Did not find a ProjName element in the Project element of file: {}".format(waterxml_file))
 
         # write updated xml
         waterxml_with_gcm_delta_file = settings["gcm_delta_prepend_name"] + waterxml_filename
 
-        waterxml.write_file(waterxml_tree = waterxml_tree, save_path = output_dir, filename = waterxml_with_gcm_delta_file)              
+        waterxml.rewrite_file(filepath = waterxml_file, save_path = output_dir, filename = waterxml_with_gcm_delta_file, 
+                              element_factors = element_factors, element_values = {"Project": {"ProjName": settings["gcm_delta_prepend_name"] + project_name}})
 
         # write the pet timeseries file
         watertxt.write_timeseries_file(watertxt_data, name = "PET", save_path = output_dir, filename = settings["pet_timeseries_file_name"])
@@ -159,7 +163,7 @@ def process_intersecting_tiles(intersecting_tiles, settings, gcm_delta_dir):
         water_files_processing.process_cmp(file_list = [updated_waterxml_file, waterxml_file], settings = settings, print_data = False)
 
     # plot the gcm deltas 
-    for deltas_data in deltas_data_list:
+    for deltas_data in delta_table.deltas_data_list:
         deltas_viewer.plot_deltas_data(deltas_data = deltas_data, save_path = helpers.make_directory(path = gcm_delta_dir, directory_name = settings["gcm_delta_directory_name"]))
 
 
@@ -191,8 +195,8 @@ def apply_gcm_deltas(settings):
     gcm_delta_tile_shapefile = osgeo.ogr.Open(settings["gcm_delta_tile_shapefile"]) 
     basin_shapefile = osgeo.ogr.Open(os.path.join(settings["simulation_directory"], settings["basin_shapefile_name"])) 
 
-    # find intersecting points (centroids) based on water basin supplied
-    intersecting_tiles_all = spatialvectors.get_intersected_field_values(intersector = basin_shapefile, intersectee = gcm_delta_tile_shapefile, intersectee_field = settings["gcm_delta_tile_shapefile_id_field"], intersector_field = settings["basin_shapefile_id_field"])
+    # find intersecting points (centroids) based on water basin supplied; the intersections are cached until either shapefile changes
+    intersecting_tiles_all = spatialvectors.get_cached_intersected_field_values(intersector = basin_shapefile, intersectee = gcm_delta_tile_shapefile, intersectee_field = settings["gcm_delta_tile_shapefile_id_field"], intersector_field = settings["basin_shapefile_id_field"], processes = settings["spatial_join_processes"])
 
     intersecting_tiles, nonintersecting_tiles = spatialvectors.validate_field_values(field_values_dict = intersecting_tiles_all)     
 
@@ -18,6 +18,7 @@ import datetime
 import re
 import logging
 import fnmatch
+import hashlib
 
 
 def now():
@@ -172,6 +173,82 @@ def get_file_info(path):
 
     return filedir, filename
 
+def get_file_md5(filepath, block_size = 2 ** 20):
+    """    
+    Compute the md5 hash of the contents of a file.  The file is read in blocks
+    so that large files are never held in memory.
+    
+    Parameters
+    ----------
+    filepath : string
+        String path to file
+    block_size : int
+        Number of bytes read at a time
+      
+    Returns
+    -------
+    md5 : string
+        String hexadecimal md5 hash of the file contents
+    """ 
+    md5 = hashlib.md5()
+
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            md5.update(block)
+
+    return md5.hexdigest()
+
+def get_file_key(filepath):
+    """    
+    Get the size, modification time, and md5 hash of the contents of a file; 
+    used to check whether a cache file made from the file is still current.
+    
+    Parameters
+    ----------
+    filepath : string
+        String path to file
+      
+    Returns
+    -------
+    key : dictionary
+        Dictionary with "size", "mtime", and "md5" keys
+    """ 
+    stat = os.stat(filepath)
+
+    key = {"size": stat.st_size, 
+           "mtime": stat.st_mtime, 
+           "md5": get_file_md5(filepath)}
+
+    return key
+
+def is_file_key_current(filepath, key):
+    """    
+    Check whether a key from get_file_key() matches the current contents of a file.
+    The size is compared first so that files that have clearly changed are not hashed.
+    
+    Parameters
+    ----------
+    filepath : string
+        String path to file
+    key : dictionary
+        Dictionary from get_file_key()
+      
+    Returns
+    -------
+    is_current : bool
+        True if both the size and the md5 hash match the key
+
+    Notes
+    -----
+    The modification time is not compared, so a file rewritten within the timestamp
+    resolution of the filesystem is never taken as unchanged, and copied or touched 
+    files with unchanged contents still match.
+    """ 
+    if os.path.getsize(filepath) != key["size"]:
+        return False
+
+    return get_file_md5(filepath) == key["md5"]
+
 def make_directory(path, directory_name):
     """    
     Make a directory if is does not exist.
@@ -355,6 +432,87 @@ def print_monthly_dict(monthly_dict):
     for month in months:
         print("\t\t{0:<15}\t{1:<15}\n".format(month, monthly_dict[month]))
 
+def convert_monthly_dict_to_array(monthly_dict):
+    """
+    Convert a dictionary with monthly keys to a 12 element array ordered
+    January through December. Months missing from the dictionary are nan.
+
+    Parameters
+    ----------
+    monthly_dict : dictionary
+        Dictionary containing monthly keys with single float values.
+
+    Returns
+    -------
+    monthly_array : array
+        Array of 12 float values; index 0 is January and index 11 is December.
+    """
+    months = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
+
+    monthly_array = np.array([monthly_dict.get(month, np.nan) for month in months], dtype = float)
+
+    return monthly_array
+
+def get_month_indices(dates):
+    """
+    Get the zero based month index of each date; January is 0 and December is 11.
+    The month indices can be used to index a 12 element monthly array such as
+    the one returned by convert_monthly_dict_to_array().
+
+    Parameters
+    ----------
+    dates : array
+        Array of datetime objects or numpy datetime64 values.
+
+    Returns
+    -------
+    month_indices : array
+        Array of integer month indices.
+    """
+    dates = np.asarray(dates)
+
+    if np.issubdtype(dates.dtype, np.datetime64):
+        month_indices = dates.astype("datetime64[M]").astype(int) % 12
+    else:
+        month_indices = np.fromiter((date.month for date in dates), dtype = int, count = len(dates)) - 1
+
+    return month_indices
+
+def get_date_factors(dates, factors):
+    """
+    Get the monthly factor that corresponds to the month of each date. 
+
+    Parameters
+    ----------
+    dates : numpy array
+        Array of datetime objects or numpy datetime64 values
+    factors : dictionary
+        Dictionary holding monthly factors
+
+    Returns
+    -------
+    date_factors : numpy array
+        Array of float factors; one factor for each date
+
+    Raises
+    ------
+    KeyError
+        If the month of a date is not a key of the factors dictionary.
+    """
+    # index 0 is January and index 11 is December
+    month_indices = get_month_indices(dates = dates)
+    monthly_factors = convert_monthly_dict_to_array(monthly_dict = factors)
+
+    # every month present in the dates needs a factor
+    for month_index in np.unique(month_indices):
+        month = datetime.date(1900, month_index + 1, 1).strftime("%B")
+        if month not in factors:
+            raise KeyError(month)
+
+    date_factors = monthly_factors[month_indices]
+
+    return date_factors
+
 def compute_simple_stats(data):
     """   
     Compute simple statistics (mean, max, min) on a data array. Can handle nan values.
@@ -504,9 +662,74 @@ def create_nan_array(shape, dtype = float):
     """     
     nan_array = np.empty(shape, dtype)
     nan_array.fill(np.nan)
-    
+
     return nan_array
 
+def parse_dates(date_strs, order = "mdy", separator = "/", as_datetime = False):
+    """
+    Parse a whole column of daily date strings at once and return an array
+    of numpy datetime64[D] values. All date strings are split in a single call
+    and the dates are assembled from year, month, and day arrays.
+
+    Parameters
+    ----------
+    date_strs : list
+        List of date strings; e.g. ["4/9/2014", "4/10/2014"] or ["2014-04-09", "2014-04-10"]
+    order : string
+        String order of the month (m), day (d), and year (y) parts in each date string; e.g. "mdy" or "ymd"
+    separator : string
+        String separating the date parts; e.g. "/" or "-"
+    as_datetime : bool
+        Boolean flag to return an array of datetime objects instead of datetime64[D] values
+
+    Returns
+    -------
+    dates : array
+        Array of numpy datetime64[D] values or, if as_datetime is True, an array of datetime objects
+
+    Raises
+    ------
+    ValueError
+        If order is not a combination of 'm', 'd', and 'y', or if a date string 
+        does not have three parts or is not a valid date.
+
+    Examples
+    --------
+    >>> import helpers
+    >>> helpers.parse_dates(["4/9/2014", "4/10/2014"])
+    array(['2014-04-09', '2014-04-10'], dtype='datetime64[D]')
+    >>> helpers.parse_dates(["2014-04-09"], order = "ymd", separator = "-", as_datetime = True)
+    array([datetime.datetime(2014, 4, 9, 0, 0)], dtype=object)
+    """
+    if sorted(order) != ["d", "m", "y"]:
+        raise ValueError("Order {} is not a combination of 'm', 'd', and 'y'".format(order))
+
+    if len(date_strs) > 0:
+        parts = separator.join(date_strs).split(separator)
+        if len(parts) != 3 * len(date_strs):
+            raise ValueError("Date strings do not all have 3 parts separated by '{}'".format(separator))
+
+        parts = np.array(parts, dtype = int).reshape(len(date_strs), 3)
+    else:
+        parts = np.zeros((0, 3), dtype = int)
+
+    years = parts[:, order.index("y")]
+    months = parts[:, order.index("m")]
+    days = parts[:, order.index("d")]
+
+    # assemble dates from the first day of each year, month offsets, and day offsets
+    month_starts = (years - 1970).astype("datetime64[Y]").astype("datetime64[M]") + (months - 1).astype("timedelta64[M]")
+    dates = month_starts.astype("datetime64[D]") + (days - 1).astype("timedelta64[D]")
+
+    # out of range months or days would roll over into another month
+    if ((months < 1) | (months > 12) | (days < 1) | (dates.astype("datetime64[M]") != month_starts)).any():
+        raise ValueError("Date strings contain an invalid month or day")
+
+    if as_datetime:
+        dates = dates.astype("datetime64[us]").astype(object)
+
+    return dates
+
 def convert_area_values(area_dict, in_units = "m2", out_units = "mi2"):
 
     for key, value in area_dict.iteritems():
@@ -17,6 +17,10 @@ import osgeo.ogr
 import osgeo.osr
 from StringIO import StringIO
 import re
+import json
+import hashlib
+import logging
+import multiprocessing
 import numpy as np
 
 # my modules
@@ -57,27 +61,255 @@ def get_shapefile_coords(shapefile):
     -------
     coordinates : dictionary
         Dictionary containing
+
+    Notes
+    -----
+    Only the coordinates of the first ring of each feature are returned; use 
+    get_shapefile_geometry_arrays() for the coordinates of all the rings, such as 
+    holes and the polygons of multipolygons.
     """   
-    shapefile_layer = shapefile.GetLayer()
+    geometry_arrays = get_shapefile_geometry_arrays(shapefile = shapefile)
     
     coords = {}
-    for feature_num in range(shapefile_layer.GetFeatureCount()):
-        shapefile_feature = shapefile_layer.GetFeature(feature_num)
-        shapefile_geometry = shapefile_feature.GetGeometryRef()            
-        points = shapefile_geometry.GetGeometryRef(0)           
-
-        lons = []
-        lats = []
-        for i in xrange(points.GetPointCount()):
-            lons.append(points.GetX(i))
-            lats.append(points.GetY(i))
+    for feature_num, fid in enumerate(geometry_arrays["fids"]):
+        rings = get_feature_rings(geometry_arrays = geometry_arrays, feature_num = feature_num)
+
+        if rings:
+            lons = rings[0][:, 0].tolist()
+            lats = rings[0][:, 1].tolist()
+        else:
+            lons = []
+            lats = []
         
         # assign the features FID as the key in coords with corresponding lon and lat values
-        fid = str(shapefile_feature.GetFID())
-        coords[fid] = (lons, lats)
+        coords[str(fid)] = (lons, lats)
     
     return coords
 
+def get_shapefile_geometry_arrays(shapefile):
+    """   
+    Get the coordinates of all the features of a shapefile in bulk as geometry arrays; 
+    see create_geometry_arrays().
+    
+    Parameters
+    ----------
+    shapefile : osgeo.ogr.DataSource 
+        A shapefile object.        
+
+    Returns
+    -------
+    geometry_arrays : dictionary
+        Dictionary containing the coordinates and offsets of the features
+    """   
+    shapefile_layer = shapefile.GetLayer()
+
+    features = [shapefile_layer.GetFeature(feature_num) for feature_num in range(shapefile_layer.GetFeatureCount())]
+
+    geometry_arrays = create_geometry_arrays(geometries = [feature.GetGeometryRef() for feature in features])
+    geometry_arrays["fids"] = np.array([feature.GetFID() for feature in features], dtype = np.int64)
+
+    return geometry_arrays
+
+def get_geometry_parts(geometry):
+    """   
+    Get the coordinates of each ring of each part of a geometry; the coordinates of a ring 
+    are read at once with GetPoints() instead of one vertex at a time.
+    
+    Parameters
+    ----------
+    geometry : osgeo.ogr.Geometry
+        A geometry object; None for a feature without a geometry.
+
+    Returns
+    -------
+    parts : list
+        List of (name, rings) tuples of the parts; name is the string geometry name of the part, 
+        i.e. "POLYGON", and rings is a list of numpy arrays of ring coordinates; the shape of each 
+        is n x 2 with columns (x, y).
+
+    Notes
+    -----
+    The parts of a multi geometry (MULTIPOLYGON, MULTIPOINT, etc.) are its geometries; 
+    other geometries are one part. The rings of a POLYGON part are its outer ring and its 
+    holes; a POINT or LINESTRING part is one ring.
+    """
+    if geometry is None:
+        return []
+
+    if geometry.GetGeometryName().startswith("MULTI"):
+        part_geometries = [geometry.GetGeometryRef(k) for k in range(geometry.GetGeometryCount())]
+    else:
+        part_geometries = [geometry]
+
+    parts = []
+    for part_geometry in part_geometries:
+        if part_geometry.GetGeometryName() == "POLYGON":
+            ring_geometries = [part_geometry.GetGeometryRef(k) for k in range(part_geometry.GetGeometryCount())]
+        else:
+            ring_geometries = [part_geometry]
+
+        rings = []
+        for ring_geometry in ring_geometries:
+            points = ring_geometry.GetPoints()
+            if points:
+                rings.append(np.array(points, dtype = np.float64)[:, :2])
+            else:
+                rings.append(np.zeros((0, 2), dtype = np.float64))
+
+        parts.append((part_geometry.GetGeometryName(), rings))
+
+    return parts
+
+def create_geometry_arrays(geometries):
+    """   
+    Create geometry arrays of a list of geometries; the coordinates of all the rings of all 
+    the geometries are stored in one flat array, and offset arrays hold where each ring, part, 
+    and geometry starts. Map rendering, area computation, and point in polygon tests can use 
+    the same arrays, and the coordinates of a ring are a view of the flat array.
+    
+    Parameters
+    ----------
+    geometries : list
+        List of osgeo.ogr.Geometry objects; None for a feature without a geometry.
+
+    Returns
+    -------
+    geometry_arrays : dictionary
+        Dictionary containing the coordinates and offsets of the geometries
+
+    Notes
+    -----
+    geometry_arrays = {
+
+        "coords": numpy float64 array of the coordinates of all the rings; shape is n x 2 with columns (x, y),
+
+        "ring_offsets": numpy int array; the coordinates of ring r are coords[ring_offsets[r]:ring_offsets[r + 1]],
+
+        "part_offsets": numpy int array; the rings of part p are ring_offsets[part_offsets[p]:part_offsets[p + 1]],
+
+        "feature_offsets": numpy int array; the parts of geometry g are part_offsets[feature_offsets[g]:feature_offsets[g + 1]],
+
+        "polygon_parts": numpy bool array; True for the parts that are polygons
+
+    }
+
+    For example, a polygon with a hole and a polygon without holes have 2 parts and 3 rings;
+    feature_offsets = [0, 1, 2], part_offsets = [0, 2, 3], and ring_offsets = [0, n1, n1 + n2, n1 + n2 + n3].
+    """
+    ring_coords = []
+    ring_sizes = []
+    part_sizes = []
+    polygon_parts = []
+    feature_sizes = []
+    for geometry in geometries:
+        parts = get_geometry_parts(geometry = geometry)
+
+        for name, rings in parts:
+            ring_coords.extend(rings)
+            ring_sizes.extend([len(ring) for ring in rings])
+            part_sizes.append(len(rings))
+            polygon_parts.append(name == "POLYGON")
+
+        feature_sizes.append(len(parts))
+
+    if ring_coords:
+        coords = np.ascontiguousarray(np.concatenate(ring_coords), dtype = np.float64)
+    else:
+        coords = np.zeros((0, 2), dtype = np.float64)
+
+    geometry_arrays = {"coords": coords, 
+                       "ring_offsets": np.concatenate([[0], np.cumsum(ring_sizes, dtype = np.int64)]).astype(np.int64), 
+                       "part_offsets": np.concatenate([[0], np.cumsum(part_sizes, dtype = np.int64)]).astype(np.int64), 
+                       "feature_offsets": np.concatenate([[0], np.cumsum(feature_sizes, dtype = np.int64)]).astype(np.int64),
+                       "polygon_parts": np.array(polygon_parts, dtype = bool)}
+
+    return geometry_arrays
+
+def get_feature_rings(geometry_arrays, feature_num):
+    """   
+    Get the coordinates of each ring of all the parts of a geometry of geometry arrays.
+    
+    Parameters
+    ----------
+    geometry_arrays : dictionary
+        Dictionary containing geometry arrays from create_geometry_arrays()
+    feature_num : int
+        Index of the geometry in the geometry arrays
+
+    Returns
+    -------
+    rings : list
+        List of numpy arrays of ring coordinates; each is a view of the coordinates of the geometry arrays.
+    """
+    ring_offsets = geometry_arrays["ring_offsets"]
+    part_offsets = geometry_arrays["part_offsets"]
+    feature_offsets = geometry_arrays["feature_offsets"]
+
+    first_ring = part_offsets[feature_offsets[feature_num]]
+    last_ring = part_offsets[feature_offsets[feature_num + 1]]
+
+    rings = [geometry_arrays["coords"][ring_offsets[r]:ring_offsets[r + 1]] for r in range(first_ring, last_ring)]
+
+    return rings
+
+def get_geometry_areas(geometry_arrays):
+    """   
+    Compute the planar area of each geometry of geometry arrays at once. The area of a 
+    polygon is the area of its outer ring less the areas of its holes, the area of a 
+    multipolygon is the sum of the areas of its polygons, and points and lines have no 
+    area, like osgeo.ogr.Geometry.GetArea().
+    
+    Parameters
+    ----------
+    geometry_arrays : dictionary
+        Dictionary containing geometry arrays from create_geometry_arrays()
+
+    Returns
+    -------
+    areas : numpy array
+        Array of float areas of the geometries in the units of the coordinates squared
+
+    Notes
+    -----
+    The area of a ring is half the absolute sum of x[i] * (y[i + 1] - y[i - 1]) over its vertices, 
+    which is the formula OGR uses. The terms of each ring are added in order and the areas of the
+    rings and parts are combined in the same order as OGR, so the areas are identical to GetArea().
+    """
+    coords = geometry_arrays["coords"]
+    ring_offsets = geometry_arrays["ring_offsets"]
+    part_offsets = geometry_arrays["part_offsets"]
+    feature_offsets = geometry_arrays["feature_offsets"]
+
+    ring_sizes = np.diff(ring_offsets)
+    ring_starts = ring_offsets[:-1]
+    ring_ends = ring_offsets[1:]
+    is_ring = ring_sizes > 0
+
+    # the next and previous vertex of each vertex, wrapping around within its ring
+    next_vertex = np.arange(1, len(coords) + 1)
+    next_vertex[ring_ends[is_ring] - 1] = ring_starts[is_ring]
+
+    previous_vertex = np.arange(-1, len(coords) - 1)
+    previous_vertex[ring_starts[is_ring]] = ring_ends[is_ring] - 1
+
+    x = coords[:, 0]
+    y = coords[:, 1]
+    terms = x * (y[next_vertex] - y[previous_vertex])
+
+    # cumsum adds the terms in order; np.sum and np.add.reduceat use pairwise summation
+    ring_areas = np.array([0.5 * abs(terms[start:end].cumsum()[-1]) if end > start else 0.0 for start, end in zip(ring_starts.tolist(), ring_ends.tolist())])
+
+    # the first ring of each polygon is the outer ring and the other rings are holes
+    part_sizes = np.diff(part_offsets)
+    ring_signs = -np.ones(len(ring_sizes))
+    ring_signs[part_offsets[:-1][part_sizes > 0]] = 1.0
+    ring_signs[np.repeat(~geometry_arrays["polygon_parts"], part_sizes)] = 0.0
+
+    part_areas = np.bincount(np.repeat(np.arange(len(part_sizes)), part_sizes), weights = ring_signs * ring_areas, minlength = len(part_sizes))
+    areas = np.bincount(np.repeat(np.arange(len(feature_offsets) - 1), np.diff(feature_offsets)), weights = part_areas, minlength = len(feature_offsets) - 1)
+
+    return areas
+
 def fill_shapefile_dict(shapefile):
     """   
     Get general shapefile information data source.
@@ -129,7 +361,7 @@ def fill_shapefile_dict(shapefile):
     return shapefile_dict
 
 
-def get_intersected_field_values(intersector, intersectee, intersectee_field, intersector_field):
+def get_intersected_field_values(intersector, intersectee, intersectee_field, intersector_field, processes = 1):
     """   
     Get the intersectee field values of interest associated with a shapefile 
     that is intersected by another shapefile.  A dictionary is returned with key(s) 
@@ -148,6 +380,8 @@ def get_intersected_field_values(intersector, intersectee, intersectee_field, in
         String name of a field in intersectee whose values will be retrieved if itersection occurs.
     intersector_field: string
         String name of a field in intersector whose values will be used as keys in the field values dictionary.
+    processes : int
+        Number of worker processes to partition the intersector features across; 1 to intersect in this process.
 
     Returns
     -------
@@ -166,6 +400,10 @@ def get_intersected_field_values(intersector, intersectee, intersectee_field, in
     
     Where the keys are each FID number of the intersector with corrsponding values that are the field values
     from the intersectee that are intersected.
+
+    Only the intersectee features whose envelopes overlap the envelope of an intersector feature are tested; 
+    see create_envelope_index(). When the intersectee is a point shapefile, such as the water use centroids, 
+    the points are tested against the rings of each polygon at once with points_in_polygon().
     """
     # make sure that the supplied fields are contained in the shapefile datasets
     intersector_data = fill_shapefile_dict(shapefile = intersector)
@@ -183,24 +421,73 @@ def get_intersected_field_values(intersector, intersectee, intersectee_field, in
     else:
         intersector_field = "FID"
 
+    is_point_layer = intersectee_data["type"] == "POINT"
+
+    # partition the intersector features across worker processes
+    if processes > 1 and intersector_data["num_features"] > 1:
+        return get_intersected_field_values_parallel(intersector_path = intersector.GetName(), intersectee_path = intersectee.GetName(), 
+                                                     intersectee_field = intersectee_field, intersector_field = intersector_field, 
+                                                     num_features = intersector_data["num_features"], is_point_layer = is_point_layer, processes = processes)
+
     # get the shapefile layer    
     intersectee_layer = intersectee.GetLayer()
     intersector_layer = intersector.GetLayer()
+
+    # read the intersectee features and index their envelopes once; the envelopes of points are the point coordinates
+    envelope_index = create_envelope_index(layer = intersectee_layer, field = intersectee_field)
     
-    # loop through each intersector feature and find its respective intersections with each of the intersectee features
+    intersections = intersect_features(intersector_layer = intersector_layer, feature_indices = range(intersector_layer.GetFeatureCount()), 
+                                       envelope_index = envelope_index, intersector_field = intersector_field, is_point_layer = is_point_layer)
+
     field_values_dict = {}
-    for i in range(intersector_layer.GetFeatureCount()):                      # loop through intersector
+    for i, intersector_field_value, field_values in intersections:
+        field_values_dict[intersector_field_value] = field_values
+
+    return field_values_dict
+
+def intersect_features(intersector_layer, feature_indices, envelope_index, intersector_field, is_point_layer):
+    """   
+    Find the intersections of intersector features with the intersectee features of an envelope index. 
+    
+    Parameters
+    ----------
+    intersector_layer : osgeo.ogr.Layer
+        A shapefile layer of the intersector.
+    feature_indices : list
+        List of int indices of the intersector features to intersect
+    envelope_index : dictionary
+        Dictionary containing an envelope index of the intersectee from create_envelope_index()
+    intersector_field: string
+        String name of a field in intersector whose values will be used as keys; FID for the feature FID's.
+    is_point_layer : bool
+        Boolean flag; True if the intersectee features are points
+
+    Returns
+    -------
+    intersections : list
+        List of tuples (feature index, intersector field value, intersectee field values) in the order of 
+        feature_indices; the intersectee field values are None if there are no intersections.
+    """
+    # loop through each intersector feature and find its respective intersections with the intersectee features whose envelopes overlap
+    intersections = []
+    for i in feature_indices:                                                  # loop through intersector
         intersector_feature = intersector_layer.GetFeature(i)
         intersector_geometry = intersector_feature.GetGeometryRef()
+        candidates = get_envelope_candidates(envelope_index = envelope_index, envelope = intersector_geometry.GetEnvelope())
             
+        # points are classified against polygon rings at once; other geometries are intersected one by one
+        rings = get_geometry_rings(geometry = intersector_geometry) if is_point_layer else None
+
         field_values = []    
-        for j in range(intersectee_layer.GetFeatureCount()):                  # loop through intersectee
-            intersectee_feature = intersectee_layer.GetFeature(j)
-            intersectee_geometry = intersectee_feature.GetGeometryRef()
+        if rings is not None:
+            is_inside = points_in_polygon(x = envelope_index["envelopes"][candidates, 0], y = envelope_index["envelopes"][candidates, 2], rings = rings)
+            field_values = [envelope_index["field_values"][j] for j in candidates[is_inside]]
+        else:
+            for j in candidates:                                                # loop through candidate intersectees
+                intersectee_geometry = envelope_index["geometries"][j]
             
-            if intersector_geometry.Intersect(intersectee_geometry):    
-                field_value = str(intersectee_feature.GetField(intersectee_field))
-                field_values.append(field_value)
+                if intersector_geometry.Intersect(intersectee_geometry):    
+                    field_values.append(envelope_index["field_values"][j])
 
         if intersector_field == "FID":
             intersector_field_value = str(intersector_feature.GetFID())
@@ -209,12 +496,446 @@ def get_intersected_field_values(intersector, intersectee, intersectee_field, in
 
         # check that intersections were found; if not, then assign None for field values
         if field_values:       
-            field_values_dict[intersector_field_value] = field_values
+            intersections.append((i, intersector_field_value, field_values))
         else:
-            field_values_dict[intersector_field_value] = None
+            intersections.append((i, intersector_field_value, None))
+
+    return intersections
+
+def get_intersected_field_values_parallel(intersector_path, intersectee_path, intersectee_field, intersector_field, num_features, is_point_layer, processes):
+    """   
+    Get the intersectee field values of interest associated with a shapefile that is intersected 
+    by another shapefile with a pool of worker processes. The intersector features are partitioned 
+    across the workers and each worker opens its own shapefiles, since shapefile objects cannot be 
+    passed to other processes. 
+    
+    Parameters
+    ----------
+    intersector_path : string
+        String path to the intersector shapefile
+    intersectee_path : string
+        String path to the intersectee shapefile
+    intersectee_field: string
+        String name of a field in intersectee whose values will be retrieved if itersection occurs.
+    intersector_field: string
+        String name of a field in intersector whose values will be used as keys; FID for the feature FID's.
+    num_features : int
+        Number of intersector features
+    is_point_layer : bool
+        Boolean flag; True if the intersectee features are points
+    processes : int
+        Number of worker processes
+
+    Returns
+    -------
+    field_values_dict : Dictionary
+        Dictionary containing lists of values for a particular field that were intersected by another shapefile; 
+        the same as from get_intersected_field_values() without worker processes.
+    """
+    processes = min(processes, num_features)
+
+    # every processes-th feature goes to the same worker, so neighboring basins of different sizes are spread across the workers
+    args_list = [(intersector_path, intersectee_path, intersectee_field, intersector_field, range(k, num_features, processes), is_point_layer) for k in range(processes)]
+
+    pool = multiprocessing.Pool(processes = processes)
+    try:
+        results = pool.map(_intersect_features_worker, args_list)
+    finally:
+        pool.close()
+        pool.join()
+
+    # merge the intersections in feature order
+    intersections = sorted([intersection for result in results for intersection in result])
+
+    field_values_dict = {}
+    for i, intersector_field_value, field_values in intersections:
+        field_values_dict[intersector_field_value] = field_values
 
     return field_values_dict
 
+def _intersect_features_worker(args):
+    """ Open the shapefiles and find the intersections of some intersector features in a worker process; see get_intersected_field_values_parallel() """
+    intersector_path, intersectee_path, intersectee_field, intersector_field, feature_indices, is_point_layer = args
+
+    intersector = osgeo.ogr.Open(intersector_path)
+    intersectee = osgeo.ogr.Open(intersectee_path)
+
+    envelope_index = create_envelope_index(layer = intersectee.GetLayer(), field = intersectee_field)
+
+    intersections = intersect_features(intersector_layer = intersector.GetLayer(), feature_indices = feature_indices, 
+                                       envelope_index = envelope_index, intersector_field = intersector_field, is_point_layer = is_point_layer)
+
+    # the features of the envelope index belong to the intersectee; release them before the shapefiles
+    del envelope_index
+    intersector.Destroy()
+    intersectee.Destroy()
+
+    return intersections
+
+def get_cached_intersected_field_values(intersector, intersectee, intersectee_field, intersector_field, processes = 1):
+    """   
+    Get the intersectee field values of interest associated with a shapefile that is intersected 
+    by another shapefile from an intersection cache file; the field values are computed with 
+    get_intersected_field_values() and written to the cache file if the cache file does not 
+    exist or is not valid.
+    
+    Parameters
+    ----------
+    intersector : osgeo.ogr.DataSource object
+        A shapefile object.
+    intersectee : osgeo.ogr.DataSource object
+        A shapefile object.
+    intersectee_field: string
+        String name of a field in intersectee whose values will be retrieved if itersection occurs.
+    intersector_field: string
+        String name of a field in intersector whose values will be used as keys in the field values dictionary.
+    processes : int
+        Number of worker processes to partition the intersector features across; 1 to intersect in this process.
+
+    Returns
+    -------
+    field_values_dict : Dictionary
+        Dictionary containing lists of values for a particular field that were intersected by another shapefile.
+
+    Notes
+    -----
+    The cache file is valid when its key matches the key of the current contents of both 
+    shapefiles and the fields; see get_intersection_cache_key(). So the cache is invalidated 
+    when either shapefile changes.
+
+    See Also
+    --------
+    get_intersected_field_values : Get the intersectee field values of interest
+    """
+    intersector_path = intersector.GetName()
+    intersectee_path = intersectee.GetName()
+
+    cache_path = get_intersection_cache_path(intersector_path = intersector_path, intersectee_path = intersectee_path)
+    key = get_intersection_cache_key(intersector_path = intersector_path, intersectee_path = intersectee_path, 
+                                     intersectee_field = intersectee_field, intersector_field = intersector_field)
+
+    field_values_dict = read_intersection_cache(cache_path = cache_path, key = key)
+
+    if field_values_dict is None:
+        field_values_dict = get_intersected_field_values(intersector = intersector, intersectee = intersectee, 
+                                                         intersectee_field = intersectee_field, intersector_field = intersector_field, processes = processes)
+
+        write_intersection_cache(cache_path = cache_path, key = key, field_values_dict = field_values_dict)
+
+    return field_values_dict
+
+def get_intersection_cache_path(intersector_path, intersectee_path):
+    """   
+    Get the path to the intersection cache file of two shapefiles; the cache file is saved 
+    next to the intersector shapefile, i.e. basin.shp.wateruse_centroids.intersections.json
+    
+    Parameters
+    ----------
+    intersector_path : string
+        String path to the intersector shapefile
+    intersectee_path : string
+        String path to the intersectee shapefile
+
+    Returns
+    -------
+    cache_path : string
+        String path to the intersection cache file
+    """
+    intersectee_name = os.path.splitext(os.path.basename(intersectee_path))[0]
+
+    cache_path = "{}.{}.intersections.json".format(intersector_path, intersectee_name)
+
+    return cache_path
+
+def get_shapefile_md5(filepath):
+    """   
+    Compute the md5 hash of the contents of a shapefile; i.e. the contents of all the 
+    files of the shapefile (\*.shp, \*.shx, \*.dbf, \*.prj) that exist.
+    
+    Parameters
+    ----------
+    filepath : string
+        String path to a shapefile
+
+    Returns
+    -------
+    md5 : string
+        String hexadecimal md5 hash of the shapefile contents
+    """
+    root, ext = os.path.splitext(filepath)
+
+    md5 = hashlib.md5()
+    for ext in [".shp", ".shx", ".dbf", ".prj"]:
+        if os.path.isfile(root + ext):
+            md5.update("{}:{};".format(ext, helpers.get_file_md5(root + ext)))
+
+    return md5.hexdigest()
+
+def get_intersection_cache_key(intersector_path, intersectee_path, intersectee_field, intersector_field):
+    """   
+    Get the key of an intersection; the md5 hash of the contents of both shapefiles and the fields.
+    
+    Parameters
+    ----------
+    intersector_path : string
+        String path to the intersector shapefile
+    intersectee_path : string
+        String path to the intersectee shapefile
+    intersectee_field: string
+        String name of a field in intersectee whose values are retrieved.
+    intersector_field: string
+        String name of a field in intersector whose values are used as keys.
+
+    Returns
+    -------
+    key : string
+        String hexadecimal md5 hash
+    """
+    key_str = "{};{};{};{}".format(get_shapefile_md5(intersector_path), get_shapefile_md5(intersectee_path), intersectee_field, intersector_field)
+
+    return hashlib.md5(key_str).hexdigest()
+
+def read_intersection_cache(cache_path, key):
+    """   
+    Read the field values dictionary of an intersection cache file if the cache is valid for a key.
+    
+    Parameters
+    ----------
+    cache_path : string
+        String path to the intersection cache file
+    key : string
+        String key of the intersection from get_intersection_cache_key()
+
+    Returns
+    -------
+    field_values_dict : Dictionary
+        Dictionary containing lists of values for a particular field that were intersected by another shapefile; 
+        None if the cache file does not exist, is not valid for the key, or cannot be read.
+    """
+    if not os.path.isfile(cache_path):
+        return None
+
+    try:
+        with open(cache_path, "r") as f:
+            cache = json.load(f)
+
+        if cache["key"] != key:
+            return None
+
+        # json strings are unicode; get back strings like the shapefile field values
+        field_values_dict = {}
+        for field_value, field_values in cache["field_values_dict"].iteritems():
+            if field_values is not None:
+                field_values = [str(value) for value in field_values]
+
+            field_values_dict[str(field_value)] = field_values
+
+    except (IOError, OSError, ValueError, KeyError, TypeError, AttributeError, UnicodeError) as error:
+        logging.warn("Cannot read intersection cache {}: {}".format(cache_path, error))
+        return None
+
+    return field_values_dict
+
+def write_intersection_cache(cache_path, key, field_values_dict):
+    """   
+    Write the field values dictionary of an intersection and its key to an intersection cache 
+    file. Errors writing the cache file, such as a read only directory, are logged and otherwise ignored.
+    
+    Parameters
+    ----------
+    cache_path : string
+        String path to the intersection cache file
+    key : string
+        String key of the intersection from get_intersection_cache_key()
+    field_values_dict : Dictionary
+        Dictionary containing lists of values for a particular field that were intersected by another shapefile.
+    """
+    try:
+        with open(cache_path, "w") as f:
+            json.dump({"key": key, "field_values_dict": field_values_dict}, f)
+
+    except (IOError, OSError, TypeError, UnicodeError) as error:
+        logging.warn("Cannot write intersection cache {}: {}".format(cache_path, error))
+
+        # do not leave a partial cache behind
+        try:
+            os.remove(cache_path)
+        except OSError:
+            pass
+
+def create_envelope_index(layer, field):
+    """   
+    Read each feature of a shapefile layer once and create an index of the feature envelopes 
+    (bounding boxes). The envelopes are stored in an array and ordered by their minimum x 
+    coordinate, so the features whose envelopes overlap an envelope are found with a binary 
+    search and a vectorized overlap test instead of a geometry test on every feature.
+    
+    Parameters
+    ----------
+    layer : osgeo.ogr.Layer
+        A shapefile layer.
+    field : string
+        String name of a field in the layer whose values are stored in the index.
+
+    Returns
+    -------
+    envelope_index : dictionary
+        Dictionary containing the features, geometries, field values, and envelopes of the layer.
+
+    Notes
+    -----
+    envelope_index = {
+
+        "features": list of osgeo.ogr.Feature objects; keeps the geometries alive,
+
+        "geometries": list of osgeo.ogr.Geometry objects of the features,
+
+        "field_values": list of string field values of the features,
+
+        "envelopes": numpy array of feature envelopes; shape is n x 4 with columns (minx, maxx, miny, maxy),
+
+        "order": numpy array of feature indices sorted by minimum x,
+
+        "sorted_minx": numpy array of sorted minimum x values
+
+    }
+
+    A feature without a geometry has an envelope of nan's, so it never overlaps.
+    """
+    features = [layer.GetFeature(j) for j in range(layer.GetFeatureCount())]
+    geometries = [feature.GetGeometryRef() for feature in features]
+    field_values = [str(feature.GetField(field)) for feature in features]
+
+    envelopes = np.empty((len(features), 4))
+    envelopes.fill(np.nan)
+    for j, geometry in enumerate(geometries):
+        if geometry is not None:
+            envelopes[j] = geometry.GetEnvelope()
+
+    order = np.argsort(envelopes[:, 0], kind = "mergesort")
+
+    envelope_index = {"features": features, 
+                      "geometries": geometries, 
+                      "field_values": field_values, 
+                      "envelopes": envelopes, 
+                      "order": order, 
+                      "sorted_minx": envelopes[order, 0]}
+
+    return envelope_index
+
+def get_envelope_candidates(envelope_index, envelope):
+    """   
+    Get the indices of the features in an envelope index whose envelopes overlap an envelope.
+    Envelopes that only touch overlap, like geometries that only touch intersect.
+    
+    Parameters
+    ----------
+    envelope_index : dictionary
+        Dictionary containing an envelope index from create_envelope_index()
+    envelope : tuple
+        Tuple of an envelope (minx, maxx, miny, maxy); i.e. from osgeo.ogr.Geometry.GetEnvelope()
+
+    Returns
+    -------
+    candidates : numpy array
+        Array of sorted feature indices; the features are in the same order as in the layer
+    """
+    minx, maxx, miny, maxy = envelope
+
+    # features whose minimum x is not greater than the maximum x of the envelope
+    num_candidates = np.searchsorted(envelope_index["sorted_minx"], maxx, side = "right")
+    candidates = envelope_index["order"][:num_candidates]
+
+    envelopes = envelope_index["envelopes"][candidates]
+    overlaps = (envelopes[:, 1] >= minx) & (envelopes[:, 2] <= maxy) & (envelopes[:, 3] >= miny)
+
+    return np.sort(candidates[overlaps])
+
+def get_geometry_rings(geometry):
+    """   
+    Get the coordinates of each ring of a polygon or multipolygon geometry; the outer rings 
+    and the holes of all the polygons. 
+    
+    Parameters
+    ----------
+    geometry : osgeo.ogr.Geometry
+        A geometry object.
+
+    Returns
+    -------
+    rings : list
+        List of numpy arrays of ring coordinates; shape of each is n x 2 with columns (x, y), and 
+        each is a view of the coordinates of create_geometry_arrays(). None if the geometry is 
+        not a polygon or multipolygon.
+    """
+    if geometry.GetGeometryName() not in ["POLYGON", "MULTIPOLYGON"]:
+        return None
+
+    geometry_arrays = create_geometry_arrays(geometries = [geometry])
+
+    rings = [ring for ring in get_feature_rings(geometry_arrays = geometry_arrays, feature_num = 0) if len(ring)]
+
+    return rings
+
+def points_in_polygon(x, y, rings, block_size = 2**20):
+    """   
+    Test which points are inside of a polygon given as its rings, with a vectorized 
+    even-odd (ray casting) test of all the points against all the ring edges. Holes and the 
+    polygons of a multipolygon are handled by the even-odd rule. Points on an edge are inside, 
+    like points on the boundary intersect a polygon.
+    
+    Parameters
+    ----------
+    x : numpy array
+        Array of x coordinates of the points
+    y : numpy array
+        Array of y coordinates of the points
+    rings : list
+        List of numpy arrays of ring coordinates from get_geometry_rings()
+    block_size : int
+        Maximum number of point and edge pairs that are tested at once
+
+    Returns
+    -------
+    is_inside : numpy array
+        Array of booleans; True for each point that is inside of the polygon
+    """
+    x = np.asarray(x, dtype = float)
+    y = np.asarray(y, dtype = float)
+
+    # edges of all the rings; each ring is closed
+    edges = []
+    for ring in rings:
+        if len(ring) and not np.array_equal(ring[0], ring[-1]):
+            ring = np.vstack([ring, ring[:1]])
+        edges.append(np.hstack([ring[:-1], ring[1:]]))
+
+    is_inside = np.zeros(len(x), dtype = bool)
+    if not edges:
+        return is_inside
+
+    edges = np.vstack(edges)
+    x1, y1, x2, y2 = edges[:, 0], edges[:, 1], edges[:, 2], edges[:, 3]
+
+    # test blocks of points against all the edges
+    num_points = max(1, block_size // len(edges))
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        for start in range(0, len(x), num_points):
+            px = x[start:start + num_points, np.newaxis]
+            py = y[start:start + num_points, np.newaxis]
+
+            # edges that a ray from the point in the positive x direction crosses
+            crosses = ((y1 > py) != (y2 > py)) & (px < (x2 - x1) * (py - y1) / (y2 - y1) + x1)
+
+            # edges that the point is on
+            on_edge = ((x2 - x1) * (py - y1) == (y2 - y1) * (px - x1)) & \
+                      (px >= np.minimum(x1, x2)) & (px <= np.maximum(x1, x2)) & \
+                      (py >= np.minimum(y1, y2)) & (py <= np.maximum(y1, y2))
+
+            is_inside[start:start + num_points] = (crosses.sum(axis = 1) % 2 == 1) | on_edge.any(axis = 1)
+
+    return is_inside
+
 def validate_field_values(field_values_dict):
     """   
     Validate field values from field values dictionary supplied by returning a
@@ -377,7 +1098,8 @@ def get_shapefile_areas(shapefile, id_field = ""):
 
     Notes
     ----- 
-    Area units are in the linear units of the projected coordinate system
+    Area units are in the linear units of the projected coordinate system. The areas of all
+    the features are computed at once from geometry arrays; see get_geometry_areas().
     """   
     
     # get shapefile data
@@ -391,12 +1113,14 @@ def get_shapefile_areas(shapefile, id_field = ""):
         id_field = "FID"
 
     shapefile_layer = shapefile.GetLayer()
+
+    shapefile_features = [shapefile_layer.GetFeature(feature_num) for feature_num in range(shapefile_layer.GetFeatureCount())]
+
+    geometry_arrays = create_geometry_arrays(geometries = [shapefile_feature.GetGeometryRef() for shapefile_feature in shapefile_features])
+    feature_areas = get_geometry_areas(geometry_arrays = geometry_arrays)
     
     areas = {}
-    for feature_num in range(shapefile_layer.GetFeatureCount()):
-        shapefile_feature = shapefile_layer.GetFeature(feature_num)
-        shapefile_geometry = shapefile_feature.GetGeometryRef()            
-        area = shapefile_geometry.GetArea()           
+    for shapefile_feature, area in zip(shapefile_features, feature_areas.tolist()):
 
         # assign the features FID as the key in coords with corresponding lon and lat values
         if id_field == "FID":
@@ -104,11 +104,8 @@ def write_ecoflow_file_drainageareaxml(file_list, dir_name, file_name):
 
         waterapputils_logging.initialize_loggers(output_dir = ecoflow_dir) 
 
-        # read xml file
-        waterxml_tree = waterxml.read_file(f)       
-
-        # get area from each region from the xml file and sum for a total area
-        project, study, simulation = waterxml.get_xml_data(waterxml_tree = waterxml_tree)
+        # read xml file incrementally; get area from each region from the xml file and sum for a total area
+        project, study, simulation = waterxml.read_xml_data(filepath = f)
 
         # get the project name which is the same as the stationid
         stationid = project["ProjName"]
@@ -57,7 +57,7 @@ def process_water_files(file_list, settings, print_data = True):
             waterapputils_logging.initialize_loggers(output_dir = output_dir) 
             helpers.print_input_output_info(input_dict = {"input_file": f}, output_dict = {"output_directory": output_dir})
 
-            data = waterxml.read_file(f)                           
+            data = waterxml.read_columnar(f)                         
             waterxml_viewer.plot_waterxml_timeseries_data(data, save_path = output_dir)             
             waterxml_viewer.plot_waterxml_topographic_wetness_index_data(data, save_path = output_dir) 
             if print_data: 
@@ -108,8 +108,8 @@ def process_cmp(file_list, settings, print_data = True):
         helpers.print_input_output_info(input_dict = {"input_file_1": water_file1, "input_file_2": water_file2}, output_dict = {"output_directory": output_dir})
         waterapputils_logging.initialize_loggers(output_dir = output_dir) 
 
-        waterxml_data1 = waterxml.read_file(water_file1)  
-        waterxml_data2 = waterxml.read_file(water_file2)         
+        waterxml_data1 = waterxml.read_columnar(water_file1)  
+        waterxml_data2 = waterxml.read_columnar(water_file2)         
         waterxml_viewer.plot_waterxml_timeseries_comparison(waterxml_data1, waterxml_data2, save_path = output_dir)         
         if print_data: 
             waterxml_viewer.print_waterxml_data(waterxml_data1)  
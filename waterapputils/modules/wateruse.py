@@ -222,16 +222,120 @@ def read_factor_file_in(filestream):
     # return data
     return data
 
+def create_wateruse_table(wateruse_data):
+    """   
+    Create a water use table from water use data; the water use values of all the water 
+    use types are stored in a 2-D array with a row for each id, and a dictionary index 
+    holds the row of each id.
+    
+    Parameters
+    ----------
+    wateruse_data : dictionary 
+        Dictionary holding data from a water use data file
+        
+    Returns
+    -------
+    wateruse_table : dictionary
+        Dictionary holding the water use table
+
+    Notes
+    -----
+    wateruse_table = {
+    
+        "months": string months of the water use data file,
+    
+        "units": string units of the water use data file,
+
+        "wateruse_types": list of string water use types; the columns of the values,
+
+        "newhydroid": list of string ids; the rows of the values,
+
+        "index": dictionary of string ids and the row of each id,
+
+        "values": 2-D numpy array of float water use values
+
+    }
+
+    If an id is in the water use data more than once, the index holds the first row of the id.
+    """
+    # get all water use types from column names
+    wateruse_types = [name for name in wateruse_data["column_names"] if name not in ["huc12", "newhydroid"]]
+
+    index = {}
+    for row, id_num in enumerate(wateruse_data["newhydroid"]):
+        index.setdefault(id_num, row)
+
+    values = np.zeros((len(wateruse_data["newhydroid"]), len(wateruse_types)), dtype = float)
+    for column, wateruse_type in enumerate(wateruse_types):
+        values[:, column] = wateruse_data[wateruse_type]
+
+    wateruse_table = {"months": wateruse_data.get("months"), 
+                      "units": wateruse_data.get("units"), 
+                      "wateruse_types": wateruse_types, 
+                      "newhydroid": wateruse_data["newhydroid"], 
+                      "index": index, 
+                      "values": values}
+
+    return wateruse_table
+
+def get_wateruse_table(wateruse_data):
+    """   
+    Get the water use table of water use data. 
+    
+    Parameters
+    ----------
+    wateruse_data : dictionary 
+        Dictionary holding data from a water use data file, or a water use table from create_wateruse_table()
+        
+    Returns
+    -------
+    wateruse_table : dictionary
+        Dictionary holding the water use table
+    """
+    if "index" in wateruse_data and "values" in wateruse_data:
+        return wateruse_data
+
+    return create_wateruse_table(wateruse_data = wateruse_data)
+
+def get_factor_values(wateruse_types, wateruse_factors = None):
+    """   
+    Get a vector of water use factors in the order of the water use types. 
+    
+    Parameters
+    ----------
+    wateruse_types : list 
+        List of string water use types
+    wateruse_factors : dictionary
+        Dictionary holding data from a water use factor file; None for no factors
+        
+    Returns
+    -------
+    factor_values : numpy array
+        Array of float factors; ones if there are no factors
+    """
+    if not wateruse_factors:
+        return np.ones(len(wateruse_types))
+
+    # make sure that wateruse_factors have same keys as wateruse types from wateruse_data
+    assert wateruse_factors["column_names"] == wateruse_types, "Water use column names {} do not equal water use types {}".format(wateruse_factors["column_names"], wateruse_types)
+
+    factor_values = np.array([wateruse_factors[wateruse_type] for wateruse_type in wateruse_types], dtype = float)
+
+    return factor_values
+
 def get_wateruse_values(wateruse_data, id_list, wateruse_factors = None):
     """   
-    Get water use values based on id(s) of interest. 
+    Get water use values based on id(s) of interest. The rows of the ids are 
+    gathered from the water use table at once and multiplied by the factors.
     
     Parameters
     ----------
-    wateruse_data : list 
-        List of dictionaries holding data from many water use data files
+    wateruse_data : dictionary 
+        Dictionary holding data from a water use data file, or a water use table from create_wateruse_table()
     id_list : list
         List of string id values
+    wateruse_factors : dictionary
+        Dictionary holding data from a water use factor file
         
     Returns
     -------
@@ -243,36 +347,24 @@ def get_wateruse_values(wateruse_data, id_list, wateruse_factors = None):
     values = [[  1.3   2.7   3.3   4.7   5.3   6.7   7.3   8.7   9.3  10.7  11.3  12.7]
               [  1.2   2.8   3.2   4.8   5.2   6.8   7.2   8.8   9.2  10.8  11.2  12.8]]
     """
-    # get all water use types from column names
-    wateruse_types = []
-    for name in wateruse_data["column_names"]:
-        if name not in ["huc12", "newhydroid"]:
-            wateruse_types.append(name)
+    wateruse_table = get_wateruse_table(wateruse_data = wateruse_data)
 
-    if wateruse_factors:
-        # make sure that wateruse_factors have same keys as wateruse types from wateruse_data
-        assert wateruse_factors["column_names"] == wateruse_types, "Water use column names {} do not equal water use types {}".format(wateruse_factors["column_names"], wateruse_types)
-    
-    # put all values into a list of lists; apply water use factors if they exist    
-    values = []
-    for id_num in id_list:
-        if id_num in wateruse_data["newhydroid"]:
-            wateruse_type_values = []
-            id_index = wateruse_data["newhydroid"].index(id_num)
-            for wateruse_type in wateruse_types:
-                if wateruse_factors:
-                    value = wateruse_data[wateruse_type][id_index] * wateruse_factors[wateruse_type]
-                else:
-                    value = wateruse_data[wateruse_type][id_index]
-                        
-                wateruse_type_values.append(value)
-                
-            values.append(wateruse_type_values)
+    factor_values = get_factor_values(wateruse_types = wateruse_table["wateruse_types"], wateruse_factors = wateruse_factors)
 
+    rows = []
+    for id_num in id_list:
+        if id_num in wateruse_table["index"]:
+            rows.append(wateruse_table["index"][id_num])
         else: 
             logging.warn("Id number {} is not in wateruse_data.".format(id_num)) 
 
-    return values
+    # gather the rows of the ids and apply water use factors if they exist    
+    if wateruse_factors:
+        values = wateruse_table["values"][rows] * factor_values
+    else:
+        values = wateruse_table["values"][rows]
+
+    return values.tolist()
 
 
 def sum_values(values):
@@ -324,22 +416,42 @@ def create_monthly_wateruse_dict(wateruse_data, wateruse_value):
 
     }        
     """
+    # create an empty dictionary that will have monthly keys and values corresponding to the summed wateruse
+    monthly_wateruse_dict = {}
+    
+    # fill monthly_dict with values for the months in wateruse_data
+    for month in get_wateruse_months(wateruse_data):
+        monthly_wateruse_dict[month] = wateruse_value
+
+    return monthly_wateruse_dict
+
+def get_wateruse_months(wateruse_data):
+    """   
+    Get the names of the months of the water use data
+    
+    Parameters
+    ----------
+    wateruse_data : dictionary
+        Dictionary containing wateruse data from wateruse file
+        
+    Returns
+    -------
+    months : list 
+        List of string month names; i.e. ["January", "February", "March"] for "JFM_WU" water use data
+    """
     wateruse_month_conversion = {"JFM": ["January", "February", "March"],
                                  "AMJ": ["April", "May", "June"],
                                  "JAS": ["July", "August", "September"],
                                  "OND": ["October", "November", "December"]
     }    
 
-    # create an empty dictionary that will have monthly keys and values corresponding to the summed wateruse
-    monthly_wateruse_dict = {}
-    
-    # loop through month conversion, if the key matches months in wateruse_data, then fill monthly_dict with values    
-    for key, values in wateruse_month_conversion.iteritems():
+    # loop through month conversion, if the key matches months in wateruse_data, then add the months
+    months = []
+    for key in ["JFM", "AMJ", "JAS", "OND"]:
         if key in wateruse_data["months"]:
-            for month in values:
-                monthly_wateruse_dict[month] = wateruse_value
+            months.extend(wateruse_month_conversion[key])
 
-    return monthly_wateruse_dict
+    return months
 
 def convert_wateruse_units(value):
     """   
@@ -369,7 +481,11 @@ def get_total_wateruse(wateruse_data, id_list, wateruse_factors = None):
     Parameters
     ----------
     wateruse_data : dictionary 
-        Dictionary containing wateruse data from wateruse file.
+        Dictionary containing wateruse data from wateruse file, or a water use table from create_wateruse_table().
+    id_list : list
+        List of string id values
+    wateruse_factors : dictionary
+        Dictionary holding data from a water use factor file
         
     Returns
     -------
@@ -388,13 +504,15 @@ def get_total_wateruse(wateruse_data, id_list, wateruse_factors = None):
 
     }   
     """       
+    wateruse_table = get_wateruse_table(wateruse_data = wateruse_data)
+
     # check that each id in id list is contained in the wateruse_data     
     for id_num in id_list:
-        if id_num not in wateruse_data["newhydroid"]:
+        if id_num not in wateruse_table["index"]:
             raise ValueError, "Water use centroid '{}' is not contained in wateruse_data.".format(id_num)
   
     # get wateruse values that correspond to a list of ids
-    values = get_wateruse_values(wateruse_data, id_list = id_list, wateruse_factors = wateruse_factors) 
+    values = get_wateruse_values(wateruse_table, id_list = id_list, wateruse_factors = wateruse_factors) 
 
     # calculate the sums of the wateruse values along different axes
     sums = sum_values(values)
@@ -418,34 +536,134 @@ def get_all_total_wateruse(wateruse_files, id_list, wateruse_factor_file = None,
         List of ids values.
     in_cfs : boolean
         Boolean flag to convert units from Mgal to cfs 
+
+    Notes
+    -----
+    The water use files are read on every call; use a WaterUseDataset to 
+    get the total water use of many lists of ids.
+
     See Also
     --------
     get_total_wateruse()
+    WaterUseDataset
     """
-    # calculate average values for a list of water use files
-    all_total_wateruse_dict = {}
-    for wateruse_file in wateruse_files:
+    wateruse_dataset = read_wateruse_dataset(wateruse_files = wateruse_files, wateruse_factor_file = wateruse_factor_file)
+
+    return wateruse_dataset.get_all_total_wateruse(id_list = id_list, in_cfs = in_cfs)
 
-        # read the water use file
-        wateruse_data = read_file(wateruse_file) 
+def read_wateruse_dataset(wateruse_files, wateruse_factor_file = None):
+    """    
+    Read water use files and a water use factor file once into a WaterUseDataset.
+    
+    Parameters
+    ----------
+    wateruse_files : list
+        List of water use files; i.e. one file for each season
+    wateruse_factor_file : string
+        String path to water use factor file; None for no factors
         
-        if wateruse_factor_file:
-            # read water use factor file
-            wateruse_factors = read_file(wateruse_factor_file, factor_file = True)
-      
-        # calculate average wateruse for a list of ids
-        total_wateruse_dict = get_total_wateruse(wateruse_data = wateruse_data, id_list = id_list, wateruse_factors = wateruse_factors)
+    Returns
+    -------
+    wateruse_dataset : WaterUseDataset
+        WaterUseDataset holding the water use tables and factors
+    """
+    wateruse_data_list = [read_file(wateruse_file) for wateruse_file in wateruse_files]
+
+    if wateruse_factor_file:
+        wateruse_factors = read_file(wateruse_factor_file, factor_file = True)
+    else:
+        wateruse_factors = None
+
+    return WaterUseDataset(wateruse_data_list = wateruse_data_list, wateruse_factors = wateruse_factors)
+
+class WaterUseDataset(object):
+    """
+    Water use tables of water use data files and the water use factors that are 
+    parsed once and reused to get the total water use of any number of lists of ids,
+    such as the centroids of many basins.
+
+    Parameters
+    ----------
+    wateruse_data_list : list
+        List of dictionaries holding data from water use data files; i.e. one for each season
+    wateruse_factors : dictionary
+        Dictionary holding data from a water use factor file; None for no factors
+
+    Notes
+    -----
+    Each water use data dictionary is stored as a water use table from 
+    create_wateruse_table(), so getting the total water use of a list of 
+    ids is a lookup in memory.
+
+    See Also
+    --------
+    read_wateruse_dataset : Read water use files and a water use factor file into a WaterUseDataset
+    """
+    def __init__(self, wateruse_data_list, wateruse_factors = None):
+        self.wateruse_tables = [create_wateruse_table(wateruse_data = wateruse_data) for wateruse_data in wateruse_data_list]
+        self.wateruse_factors = wateruse_factors
+
+    def get_all_total_wateruse(self, id_list, in_cfs = False):
+        """ Get the total water use of a list of ids for each month of all the water use tables; same as get_all_total_wateruse() """
+        all_total_wateruse_dict = {}
+        for wateruse_table in self.wateruse_tables:
+
+            # calculate average wateruse for a list of ids
+            total_wateruse_dict = get_total_wateruse(wateruse_data = wateruse_table, id_list = id_list, wateruse_factors = self.wateruse_factors)
+
+            # convert values to cfs
+            if in_cfs:
+                for key, value in total_wateruse_dict.iteritems():
+                    value_cfs = convert_wateruse_units(value)
+                    total_wateruse_dict[key] = value_cfs
+            
+            # update dictionary 
+            all_total_wateruse_dict.update(total_wateruse_dict)   
+        
+        return all_total_wateruse_dict
+
+    def get_basins_total_wateruse(self, intersecting_centroids, in_cfs = False):
+        """ 
+        Get the total water use of every basin at once; intersecting_centroids is the dictionary of 
+        basin featureids and lists of centroid ids from spatialvectors.get_intersected_field_values().
+        Returns the list of featureids, the list of the months of the water use tables (January first), 
+        and an array of totals (featureids x months); a total is nan if a water use value is nan. For each 
+        water use table, the per centroid totals are summed into the basins in one pass, which is the product 
+        of a sparse basins x centroids membership matrix and the centroids x water use types matrix of values.
+        """
+        featureids = sorted(intersecting_centroids.keys())
+
+        # months of all the water use tables in calendar order
+        table_months = [month for wateruse_table in self.wateruse_tables for month in get_wateruse_months(wateruse_table)]
+        months = [month for month in ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"] if month in table_months]
+
+        # a (basin, centroid) pair for each centroid of each basin
+        basin_indices = np.array([i for i, featureid in enumerate(featureids) for id_num in intersecting_centroids[featureid]], dtype = int)
+        id_list = [id_num for featureid in featureids for id_num in intersecting_centroids[featureid]]
+
+        totals = np.zeros((len(featureids), len(months)))
+        for wateruse_table in self.wateruse_tables:
+
+            # check that each id in id list is contained in the wateruse_data     
+            for id_num in id_list:
+                if id_num not in wateruse_table["index"]:
+                    raise ValueError, "Water use centroid '{}' is not contained in wateruse_data.".format(id_num)
+
+            rows = np.array([wateruse_table["index"][id_num] for id_num in id_list], dtype = int)
+
+            # total of all the water use types of each centroid, then of each basin
+            factor_values = get_factor_values(wateruse_types = wateruse_table["wateruse_types"], wateruse_factors = self.wateruse_factors)
+            centroid_totals = np.dot(wateruse_table["values"], factor_values)
+            basin_totals = np.bincount(basin_indices, weights = centroid_totals[rows], minlength = len(featureids))
+
+            for month in get_wateruse_months(wateruse_table):
+                totals[:, months.index(month)] = basin_totals
 
         # convert values to cfs
         if in_cfs:
-            for key, value in total_wateruse_dict.iteritems():
-                value_cfs = convert_wateruse_units(value)
-                total_wateruse_dict[key] = value_cfs
-        
-        # update dictionary 
-        all_total_wateruse_dict.update(total_wateruse_dict)   
-    
-    return all_total_wateruse_dict
+            totals = convert_wateruse_units(totals)
+
+        return featureids, months, totals
   
 def _create_test_data():
     """ Create test data for tests """
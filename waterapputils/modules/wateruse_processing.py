@@ -96,15 +96,17 @@ def process_intersecting_centroids(intersecting_centroids, settings, ecoflow_dir
     -----
     Uses settings set in user_settings.py 
     """      
-    # create a file for the output  
-    for featureid, centroids in intersecting_centroids.iteritems():
+    # read the water use files and the water use factor file once for all the featureids
+    wateruse_dataset = wateruse.read_wateruse_dataset(wateruse_files = settings["wateruse_files"], wateruse_factor_file = settings["wateruse_factor_file"])
 
-        # get sum of the water use data
-        if settings["wateruse_factor_file"]:
-            total_wateruse_dict = wateruse.get_all_total_wateruse(wateruse_files = settings["wateruse_files"], id_list = centroids, wateruse_factor_file = settings["wateruse_factor_file"], in_cfs = True)
+    # get sum of the water use data of all the featureids at once
+    featureids, months, totals = wateruse_dataset.get_basins_total_wateruse(intersecting_centroids = intersecting_centroids, in_cfs = True)
 
-        else:
-            total_wateruse_dict = wateruse.get_all_total_wateruse(wateruse_files = settings["wateruse_files"], id_list = centroids, wateruse_factor_file = None, in_cfs = True)
+    # create a file for the output  
+    for featureid, monthly_totals in zip(featureids, totals):
+
+        centroids = intersecting_centroids[featureid]
+        total_wateruse_dict = dict(zip(months, monthly_totals.tolist()))
 
         # print monthly output in nice format to info file
         print("FeatureId: {}\n    Centroids: {}\n    Total Water Use:\n".format(featureid, centroids))  
@@ -177,8 +179,8 @@ def apply_wateruse(settings):
     centroids_shapefile = osgeo.ogr.Open(settings["wateruse_centroids_shapefile"]) 
     basin_shapefile = osgeo.ogr.Open(os.path.join(settings["simulation_directory"], settings["basin_shapefile_name"])) 
 
-    # find intersecting points (centroids) based on water basin supplied
-    intersecting_centroids_all = spatialvectors.get_intersected_field_values(intersector = basin_shapefile, intersectee = centroids_shapefile, intersectee_field = settings["wateruse_centroids_shapefile_id_field"], intersector_field = settings["basin_shapefile_id_field"])
+    # find intersecting points (centroids) based on water basin supplied; the intersections are cached until either shapefile changes
+    intersecting_centroids_all = spatialvectors.get_cached_intersected_field_values(intersector = basin_shapefile, intersectee = centroids_shapefile, intersectee_field = settings["wateruse_centroids_shapefile_id_field"], intersector_field = settings["basin_shapefile_id_field"], processes = settings["spatial_join_processes"])
 
     intersecting_centroids, nonintersecting_centroids = spatialvectors.validate_field_values(field_values_dict = intersecting_centroids_all)     
 
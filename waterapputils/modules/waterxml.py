@@ -12,16 +12,93 @@ __copyright__ = "http://www.usgs.gov/visual-id/credit_usgs.html#copyright"
 __license__   = __copyright__
 __contact__   = __author__
 
-try:    
-    import xml.etree.cElementTree as ET
-except ImportError:    
-    import xml.etree.ElementTree as ET
-
 import numpy as np
 import datetime
 import logging
 from StringIO import StringIO
 import os
+import re
+import zipfile
+import xml.etree.ElementTree
+from xml.sax.saxutils import escape as xml_escape
+
+# my modules
+import helpers
+
+# xml parser backends in order of preference; cElementTree and lxml are C accelerated. cElementTree is 
+# first since it is as fast as lxml for read_xml_data(), which the processing scripts use, and lxml is 
+# only faster for building whole trees; lxml is used when set with set_backend("lxml")
+XML_BACKENDS = ["cElementTree", "lxml", "ElementTree"]
+
+def import_backend(name):
+    """    
+    Import an ElementTree compatible xml parser backend.
+    
+    Parameters
+    ----------
+    name : string
+        String name of the backend; "lxml", "cElementTree", or "ElementTree"
+        
+    Returns
+    -------
+    backend : module
+        The ElementTree compatible module of the backend
+
+    Raises
+    ------
+    ImportError
+        If the backend is not installed.
+    ValueError
+        If the name is not a known backend.
+    """    
+    if name == "lxml":
+        from lxml import etree as backend
+    elif name == "cElementTree":
+        import xml.etree.cElementTree as backend
+    elif name == "ElementTree":
+        import xml.etree.ElementTree as backend
+    else:
+        raise ValueError("Xml backend {} not one of {}".format(name, XML_BACKENDS))
+
+    return backend
+
+def set_backend(name = None):
+    """    
+    Set the xml parser backend used by all the functions of this module. 
+    The backends give the same data and write the same files, they only differ 
+    in speed; see benchmarks/waterxml_backends.py.
+    
+    Parameters
+    ----------
+    name : string
+        String name of the backend; "lxml", "cElementTree", or "ElementTree".
+        Default is None, which sets the first installed backend of XML_BACKENDS.
+        
+    Returns
+    -------
+    name : string
+        String name of the backend that is set
+
+    Raises
+    ------
+    ImportError
+        If the backend, or no backend when name is None, is installed.
+    """    
+    global ET, BACKEND
+
+    names = XML_BACKENDS if name is None else [name]
+    for backend_name in names:
+        try:
+            ET = import_backend(name = backend_name)
+        except ImportError:
+            continue
+
+        BACKEND = backend_name
+        return BACKEND
+
+    raise ImportError("No xml backend of {} is installed".format(names))
+
+set_backend()
 
 def read_file(filepath):
     """    
@@ -37,8 +114,15 @@ def read_file(filepath):
     tree : ElementTree object  
         Object that contains xml data in a tree. 
         
+    Notes
+    -----
+    Like the ElementTree parsers, the lxml parser drops comments and processing 
+    instructions so that every element of the tree is a data element.
     """    
-    tree = ET.parse(filepath)
+    if BACKEND == "lxml":
+        tree = ET.parse(filepath, ET.XMLParser(remove_comments = True, remove_pis = True))
+    else:
+        tree = ET.parse(filepath)
         
     return tree
 
@@ -170,6 +254,9 @@ def get_simulation_data(waterxml_tree, element, sim_id_num):
 def fill_simulation_dict(waterxml_tree, simulation_dict):
     """
     Fills the simulation dictionary with feature, topographic wetness, and climatic timeseries data.
+    The tree is walked once and each element of interest is bucketed by its tag and SimulID, 
+    instead of walking the tree once for each element of interest and each SimulID with
+    get_simulation_data().
     
     Parameters
     ----------
@@ -187,14 +274,29 @@ def fill_simulation_dict(waterxml_tree, simulation_dict):
     simulation_dict : dictionary 
         Dictionary containing keys that match particular children in the simulation element
     """
-    # fill general information about simulation
-    simulation_dict = fill_dict(waterxml_tree = waterxml_tree, data_dict = simulation_dict, element = "StudySimulation", keys = ["SimulID", "StudyID", "RegionType"])    
-    
-    # fill feature, topographic wetness, and climatic timeseries data
+    general_keys = ["SimulID", "StudyID", "RegionType"]
     specific_keys = ["SimulationFeatures", "SimulationTopographicWetnessIndex", "StudyUnitDischargeSeries", "ClimaticPrecipitationSeries", "ClimaticTemperatureSeries"]
+
+    # walk the tree once; fill general information about simulation and bucket the 
+    # feature, topographic wetness, and climatic timeseries data by (tag, SimulID)
+    buckets = {}
+    for elem in waterxml_tree.iter():
+        if elem.tag in specific_keys:
+            data_dict = {}
+            for child in elem:
+                data_dict[child.tag] = child.text
+
+            buckets.setdefault((elem.tag, int(elem.find("SimulID").text)), []).append(data_dict)
+
+        elif elem.tag == "StudySimulation":
+            for child in elem:
+                if child.tag in general_keys:
+                    simulation_dict[child.tag].append(child.text)
+    
+    # fill feature, topographic wetness, and climatic timeseries data in SimulID order
     for key in specific_keys:
         for i in range(len(simulation_dict["SimulID"])):                
-            data = get_simulation_data(waterxml_tree = waterxml_tree, element = key, sim_id_num = simulation_dict["SimulID"][i])
+            data = list(buckets.get((key, int(simulation_dict["SimulID"][i])), []))
             simulation_dict[key].append(data)
     
     return simulation_dict
@@ -238,6 +340,259 @@ def get_xml_data(waterxml_tree):
     return project, study, simulation
 
 
+def read_xml_data(filepath, deduplicate = True):
+    """
+    Incrementally parse a WATER \*.xml file with iterparse and get the same information 
+    of interest as get_xml_data() without building the whole tree in memory. Each element
+    is cleared as soon as its information is stored, and the values of the timeseries 
+    parameters are stored in numpy arrays instead of dictionaries of strings.
+    
+    Parameters
+    ----------
+    filepath : string or file object
+        A string path to file or a file object that contains an open xml file.
+    deduplicate : bool
+        If True, identical timeseries dates and values arrays are stored once and 
+        shared by all SimulID's; see deduplicate_timeseries().
+    
+    Returns
+    -------
+    project : dictionary 
+        Dictionary containing information found in the 'Project' element
+    study : dictionary 
+        Dictionary containing information found in the 'Study' element
+    simulation : dictionary 
+        Dictionary containing information found in the 'StudySimulation' element
+
+    Notes
+    -----
+    The "StudyUnitDischargeSeries", "ClimaticPrecipitationSeries", and "ClimaticTemperatureSeries" 
+    values of the simulation dictionary are lists with one timeseries dictionary for each SimulID
+    instead of a list of dictionaries for each SimulID:
+
+    timeseries = {
+
+        "dates": numpy array of datetime objects,
+
+        "values": numpy array of float values,
+
+        "units": string units
+    
+    }
+
+    get_timeseries_data() works with the simulation dictionary of either function.
+
+    See Also
+    --------
+    get_xml_data : Get information of interest from an xml tree
+    get_timeseries_data : Get dates, values, and units from timeseries parameters
+    deduplicate_timeseries : Share identical timeseries arrays across SimulID's
+    write_xml_data : Write the timeseries values back to a copy of the xml file
+    """
+    project = create_project_dict()
+    study = create_study_dict()
+    simulation = create_simulation_dict()
+
+    timeseries_keys = ["StudyUnitDischargeSeries", "ClimaticPrecipitationSeries", "ClimaticTemperatureSeries"]
+    other_keys = ["SimulationFeatures", "SimulationTopographicWetnessIndex"]
+
+    # timeseries buffers and lists of dictionaries for each (key, SimulID)
+    simulation_data = {}
+
+    # stack of open elements; the last element is the parent of the element that ended
+    stack = []
+    for event, elem in ET.iterparse(filepath, events = ("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            continue
+
+        stack.pop()
+        parent_tag = stack[-1].tag if stack else None
+
+        if elem.tag in timeseries_keys:
+            data_dict = {}
+            for child in elem:
+                data_dict[child.tag] = child.text
+
+            buffer_key = (elem.tag, int(data_dict["SimulID"]))
+            if buffer_key not in simulation_data:
+                simulation_data[buffer_key] = create_series_buffer(units = data_dict["SeriesUnit"])
+
+            append_series_value(series_buffer = simulation_data[buffer_key], 
+                                date_str = data_dict["SeriesDate"].split("T")[0], 
+                                value = data_dict["SeriesValue"])
+
+        elif elem.tag in other_keys:
+            data_dict = {}
+            for child in elem:
+                data_dict[child.tag] = child.text
+
+            simulation_data.setdefault((elem.tag, int(data_dict["SimulID"])), []).append(data_dict)
+
+        elif parent_tag == "Project" and elem.tag in project:
+            project[elem.tag] = elem.text
+
+        elif parent_tag == "Study" and elem.tag in study:
+            study[elem.tag] = elem.text
+
+        elif parent_tag == "StudySimulation" and elem.tag in ["SimulID", "StudyID", "RegionType"]:
+            simulation[elem.tag].append(elem.text)
+
+        else:
+            continue
+
+        # the information of the element and its previous siblings is stored, so drop them;
+        # lxml still needs the element itself to parse its tail, so it is only cleared
+        elem.clear()
+        if stack:
+            del stack[-1][:-1]
+
+    # fill feature, topographic wetness, and climatic timeseries data in SimulID order
+    for sim_id_num in simulation["SimulID"]:
+        for key in other_keys:
+            simulation[key].append(simulation_data.get((key, int(sim_id_num)), []))
+
+        for key in timeseries_keys:
+            simulation[key].append(get_series_buffer_data(series_buffer = simulation_data.get((key, int(sim_id_num)))))
+
+    if deduplicate:
+        simulation = deduplicate_timeseries(simulation_dict = simulation)
+
+    return project, study, simulation
+
+def create_series_buffer(units = None, size = 4096):
+    """
+    Create a growable buffer of timeseries dates and values. 
+
+    Parameters
+    ----------
+    units : string
+        String units of the timeseries values
+    size : int
+        Initial number of dates and values the buffer can hold
+
+    Returns
+    -------
+    series_buffer : dictionary
+        Dictionary containing arrays of date strings and values, the number of values
+        stored, and the units
+    """
+    series_buffer = {"dates": np.empty(size, dtype = "S10"), "values": np.empty(size, dtype = float), "size": 0, "units": units}
+
+    return series_buffer
+
+def append_series_value(series_buffer, date_str, value):
+    """
+    Append a date and value to a timeseries buffer; the buffer doubles in 
+    size when it is full.
+
+    Parameters
+    ----------
+    series_buffer : dictionary
+        Dictionary created by create_series_buffer()
+    date_str : string
+        String date; i.e. 2014-01-01
+    value : string
+        String value
+    """
+    size = series_buffer["size"]
+
+    if size == len(series_buffer["values"]):
+        series_buffer["dates"] = np.resize(series_buffer["dates"], max(1, 2 * size))
+        series_buffer["values"] = np.resize(series_buffer["values"], max(1, 2 * size))
+
+    series_buffer["dates"][size] = date_str
+    series_buffer["values"][size] = float(value)
+    series_buffer["size"] = size + 1
+
+def get_series_buffer_data(series_buffer):
+    """
+    Get the dates, values, and units stored in a timeseries buffer. 
+
+    Parameters
+    ----------
+    series_buffer : dictionary
+        Dictionary created by create_series_buffer(); None for an empty timeseries
+
+    Returns
+    -------
+    timeseries : dictionary
+        Dictionary containing a numpy array of datetime objects ("dates"), 
+        a numpy array of float values ("values"), and string units ("units")
+    """
+    if series_buffer is None:
+        series_buffer = create_series_buffer(size = 0)
+
+    size = series_buffer["size"]
+
+    timeseries = {"dates": helpers.parse_dates(date_strs = series_buffer["dates"][:size].tolist(), order = "ymd", separator = "-", as_datetime = True),
+                  "values": series_buffer["values"][:size].copy(),
+                  "units": series_buffer["units"]}
+
+    return timeseries
+
+def get_shared_array(array, shared_arrays):
+    """
+    Get the array in a list of shared arrays that is equal to an array. If 
+    there is no equal array, the array is made read-only and added to the list.
+
+    Parameters
+    ----------
+    array : numpy array
+        Array to look up
+    shared_arrays : list
+        List of read-only numpy arrays that are already shared
+
+    Returns
+    -------
+    shared_array : numpy array
+        Read-only array equal to the array
+    """
+    for shared_array in shared_arrays:
+        if shared_array.dtype == array.dtype and shared_array.shape == array.shape and np.array_equal(shared_array, array):
+            return shared_array
+
+    array.flags.writeable = False
+    shared_arrays.append(array)
+
+    return array
+
+def deduplicate_timeseries(simulation_dict):
+    """
+    Store identical timeseries dates and values only once. Each SimulID keeps its 
+    own timeseries dictionary, but the "dates" and "values" of the dictionaries refer 
+    to a single read-only array when they are equal to those of another timeseries.
+
+    Parameters
+    ----------
+    simulation_dict : dictionary 
+        Dictionary from read_xml_data() containing timeseries dictionaries
+
+    Returns
+    -------
+    simulation_dict : dictionary 
+        Dictionary with shared timeseries arrays
+
+    Notes
+    -----
+    The WATER \*.xml repeats each timeseries for every SimulID and all the timeseries 
+    share the same dates, so for the usual 3 SimulID's this stores the timeseries in
+    about a third of the memory.
+
+    The shared arrays are read-only; to change the values of a timeseries, set a new 
+    array to the "values" of the timeseries dictionary of every SimulID that should change.
+    """
+    shared_arrays = []
+    for key in ["StudyUnitDischargeSeries", "ClimaticPrecipitationSeries", "ClimaticTemperatureSeries"]:
+        for timeseries in simulation_dict[key]:
+            if not isinstance(timeseries, dict):
+                continue
+
+            timeseries["dates"] = get_shared_array(array = timeseries["dates"], shared_arrays = shared_arrays)
+            timeseries["values"] = get_shared_array(array = timeseries["values"], shared_arrays = shared_arrays)
+
+    return simulation_dict
+
 def get_series_date(date_time):
     """   
     Get dates, values, and units from timeseries parameters contained in the 
@@ -369,22 +724,20 @@ def get_timeseries_data(simulation_dict, timeseries_key):
     values = []
     units = []     
     for i in range(len(simulation_dict["SimulID"])):        # loop for each simulation id
-        date = []
-        value = []
-        unit = []
         parameter = simulation_dict[timeseries_key][i]      # get the timeseries parameter for a particular simulation id
-        for j in range(len(parameter)):                     # loop for each parameter dictionary for a particular simulation id
-            d = get_series_date(date_time = parameter[j]["SeriesDate"])                       
-            v = parameter[j]['SeriesValue']
-            u = parameter[j]['SeriesUnit']
-            
-            date.append(d)
-            value.append(v)            
-            unit.append(u)
-            
-        date = np.array(date)    
-        value = np.array(value, dtype = float)
-        unit = unit[0]
+
+        # timeseries dictionary from read_xml_data()
+        if isinstance(parameter, dict):
+            dates.append(parameter["dates"])
+            values.append(parameter["values"])
+            units.append(parameter["units"])
+            continue
+
+        # parse all the dates of a particular simulation id at once; i.e. 2014-01-01T00:00:00-05:00
+        date_strs = [p["SeriesDate"].split("T")[0] for p in parameter]
+        date = helpers.parse_dates(date_strs = date_strs, order = "ymd", separator = "-", as_datetime = True)
+        value = np.array([p["SeriesValue"] for p in parameter], dtype = float)
+        unit = parameter[0]["SeriesUnit"]
           
         dates.append(date)
         values.append(value)
@@ -397,6 +750,8 @@ def apply_factors(waterxml_tree, element, factors):
     Apply monthly factors to a specific element (parameter). The factors are applied 
     to the particular element tag.  If the element is 'ClimaticTemperatureSeries'
     the factor is additive, otherwise the factor is multiplicative.
+    All the dates and values of the element are collected in one pass, the new 
+    values are computed as an array, and the text of the values is set in one pass.
      
     Parameters
     ----------
@@ -437,25 +792,49 @@ def apply_factors(waterxml_tree, element, factors):
 
     }  
     """
+    # collect the date strings and value elements of every element in one pass; i.e. 2014-01-01T00:00:00-05:00
+    date_strs = []
+    value_elems = []
     for elem in waterxml_tree.iter(tag = element):
-        # get element date and match the appropriate factor fraom factors   
-        date = get_series_date(date_time = elem.find('SeriesDate').text)
+        date_strs.append(elem.find('SeriesDate').text.split('T')[0])
+        value_elems.append(elem.find('SeriesValue'))
 
-        # match the month from the date value to the factors dictionary key
-        month = date.strftime("%B")     # get month 
-        factor = factors[month]         # get the factor that corresponds to a specific month 
-        
-        # get element value
-        elem_value = elem.find('SeriesValue')
-        
-        # calculate new value based on monthly factor
-        if element == 'ClimaticTemperatureSeries':
-            new_value = float(elem_value.text) + factor
-        else:
-            new_value = float(elem_value.text) * factor
-        
-        # set new value
-        elem_value.text = "{}".format(new_value)
+    # match the month of each date to the factors
+    dates = helpers.parse_dates(date_strs = date_strs, order = "ymd", separator = "-")
+    date_factors = helpers.get_date_factors(dates = dates, factors = factors)
+
+    values = np.fromiter(map(float, [elem_value.text for elem_value in value_elems]), dtype = float, count = len(value_elems))
+
+    # calculate new values based on monthly factors
+    if element == 'ClimaticTemperatureSeries':
+        new_values = values + date_factors
+    else:
+        new_values = values * date_factors
+
+    # set new values
+    for elem_value, new_value in zip(value_elems, format_series_values(values = new_values)):
+        elem_value.text = new_value
+
+def format_series_values(values):
+    """
+    Format values as the text of 'SeriesValue' elements. 
+     
+    Parameters
+    ----------
+    values : array
+        Array of float values
+
+    Returns
+    -------
+    texts : list
+        List of string text of the values
+
+    Notes
+    -----
+    str() of a float is the same as "{}".format() of the float, which is how the
+    values were always written.
+    """
+    return [str(value) for value in np.asarray(values, dtype = float).tolist()]
 
 def write_file(waterxml_tree, save_path, filename = "WATERSimulation.xml"):
     """   
@@ -470,11 +849,663 @@ def write_file(waterxml_tree, save_path, filename = "WATERSimulation.xml"):
         String path to save file.
     filename : string
         String name of output file. Default name is WATER.txt.
+
+    Notes
+    -----
+    An lxml tree is written with the ElementTree serializer, like the trees of the 
+    other backends, so every backend writes the same bytes; lxml on its own writes
+    empty elements as <x/> instead of <x /> and keeps attributes in document order
+    instead of sorting them.
     """    
     filepath = os.path.join(save_path, filename) 
     
+    if BACKEND == "lxml":
+        waterxml_tree = xml.etree.ElementTree.ElementTree(waterxml_tree.getroot())
+
     waterxml_tree.write(filepath) 
 
+def write_xml_data(filepath, simulation_dict, save_path, filename = "WATERSimulation.xml", block_size = 2 ** 20):
+    """   
+    Write a copy of a WATER \*.xml file with the timeseries values of a simulation 
+    dictionary from read_xml_data(). The file is streamed in blocks and only the text 
+    of each 'SeriesValue' whose value changed is replaced, so the shared timeseries 
+    arrays are expanded back to every SimulID without building an xml tree.
+    
+    Parameters
+    ----------
+    filepath : string
+        String path to the original xml file that the simulation dictionary was read from
+    simulation_dict : dictionary 
+        Dictionary from read_xml_data() containing timeseries dictionaries
+    save_path : string 
+        String path to save file.
+    filename : string
+        String name of output file. Default name is WATERSimulation.xml.
+    block_size : int
+        Number of bytes read from the original file at a time
+
+    Notes
+    -----
+    The values of each timeseries element are matched to the "values" array of the 
+    timeseries dictionary of its SimulID in the order the elements are in the file.
+    Text that does not change is written as is, so the output is the same as the 
+    original file when the values are unchanged.
+
+    See Also
+    --------
+    read_xml_data : Incrementally parse a WATER \*.xml file
+    write_file : Write an xml tree to an output file
+    rewrite_file : Stream a WATER \*.xml file applying factors and new element values
+    """
+    timeseries_keys = ["StudyUnitDischargeSeries", "ClimaticPrecipitationSeries", "ClimaticTemperatureSeries"]
+
+    # index of each SimulID and number of values written for each (key, SimulID)
+    sim_indices = dict((int(sim_id_num), i) for i, sim_id_num in enumerate(simulation_dict["SimulID"]))
+    counts = {}
+
+    with open(filepath, "rb") as source, open(os.path.join(save_path, filename), "wb") as output:
+        for pieces in iter_element_blocks(filestream = source, tags = timeseries_keys, block_size = block_size):
+            for tag, text in pieces:
+                if tag is None:
+                    output.write(text)
+                    continue
+
+                key = (tag, int(get_child_text(element_text = text, child = "SimulID")))
+                index = counts.get(key, 0)
+                counts[key] = index + 1
+
+                value = simulation_dict[tag][sim_indices[key[1]]]["values"][index].item()
+                old_value = float(get_child_text(element_text = text, child = "SeriesValue"))
+
+                if not (old_value == value or (np.isnan(old_value) and np.isnan(value))):
+                    text = substitute_child_text(element_text = text, child = "SeriesValue", new_text = format_series_values(values = [value])[0])
+
+                output.write(text)
+
+def rewrite_file(filepath, save_path, filename = "WATERSimulation.xml", element_factors = None, element_values = None, block_size = 2 ** 20):
+    """   
+    Copy a WATER \*.xml file to an output file one block at a time, applying monthly 
+    factors to the values of timeseries elements and setting new values of elements 
+    on the way. Only the text of the values that change is replaced; the xml tree 
+    is never built, so files larger than the available memory can be processed.
+    
+    Parameters
+    ----------
+    filepath : string
+        String path to the original xml file
+    save_path : string 
+        String path to save file.
+    filename : string
+        String name of output file. Default name is WATERSimulation.xml.
+    element_factors : dictionary
+        Dictionary of timeseries element names and the dictionaries of monthly factors to
+        apply to them; i.e. {"ClimaticPrecipitationSeries": factors}
+    element_values : dictionary
+        Dictionary of parent element names and dictionaries of the names of their child elements
+        and the new string values of the children; i.e. {"Project": {"ProjName": "new name"}}
+    block_size : int
+        Number of bytes read from the original file at a time
+
+    Raises
+    ------
+    ValueError
+        If a child element in element_values is not found in its parent element; the
+        output file is removed.
+
+    Notes
+    -----
+    The factors are applied the same way as apply_factors(); the factor of a 
+    'ClimaticTemperatureSeries' is additive, otherwise the factor is multiplicative.
+
+    Every child element in element_values that is a direct child of its parent element 
+    gets the new value, the same as change_element_value(); elements with the same name 
+    elsewhere in the file are left as is. The file has no comments or CDATA sections.
+
+    See Also
+    --------
+    apply_factors : Apply monthly factors to an element of an xml tree
+    change_element_value : Change an elements value in an xml tree
+    """
+    if element_factors is None:
+        element_factors = {}
+
+    if element_values is None:
+        element_values = {}
+
+    # parents of each child element that gets a new value; i.e. {"ProjName": ["Project"]}
+    value_parents = {}
+    for parent, children in element_values.iteritems():
+        for child in children:
+            value_parents.setdefault(child, []).append(parent)
+
+    tags = element_factors.keys() + value_parents.keys()
+
+    # names of the elements that are open before the current piece and the (parent, child) elements given new values
+    path = []
+    changed = set()
+
+    output_path = os.path.join(save_path, filename)
+    with open(filepath, "rb") as source, open(output_path, "wb") as output:
+        for pieces in iter_element_blocks(filestream = source, tags = tags, block_size = block_size):
+
+            # apply the factors to all the timeseries elements of the block at once
+            for element, factors in element_factors.iteritems():
+                indices = [i for i, (tag, text) in enumerate(pieces) if tag == element]
+                if not indices:
+                    continue
+
+                new_texts = apply_factors_text(element_texts = [pieces[i][1] for i in indices], element = element, factors = factors)
+                for i, new_text in zip(indices, new_texts):
+                    pieces[i] = (element, new_text)
+
+            for tag, text in pieces:
+                if tag is None:
+                    if value_parents:
+                        update_element_path(text = text, path = path)
+
+                elif tag in value_parents and path and path[-1] in value_parents[tag]:
+                    # keep the attributes of the start tag; a self-closing tag becomes a start and end tag
+                    start_tag = re.match(r"<[^>]*?(?=/?>)", text).group(0)
+                    text = "{0}>{1}</{2}>".format(start_tag, xml_escape(element_values[path[-1]][tag]), tag)
+                    changed.add((path[-1], tag))
+
+                output.write(text)
+
+    missing = ["{}/{}".format(parent, child) for parent, children in element_values.iteritems() for child in children if (parent, child) not in changed]
+    if missing:
+        os.remove(output_path)
+        raise ValueError("Did not find elements {} in file: {}".format(", ".join(missing), filepath))
+
+def update_element_path(text, path):
+    """
+    Update the names of the open elements with the start and end tags in a text.
+
+    Parameters
+    ----------
+    text : string
+        String text of part of an xml file that has only complete tags
+    path : list
+        List of string names of the open elements, outermost first; updated in place
+    """
+    for end, name, empty in re.findall(r"<(/?)([^\s/>!?]+)[^>]*?(/?)>", text):
+        if end:
+            path.pop()
+        elif not empty:
+            path.append(name)
+
+def apply_factors_text(element_texts, element, factors):
+    """
+    Apply monthly factors to the text of timeseries elements. 
+     
+    Parameters
+    ----------
+    element_texts : list
+        List of string text of timeseries elements
+    element : string
+        String name of parameter
+    factors : dictionary
+        Dictionary holding monthly multiplicative factors
+
+    Returns
+    -------
+    new_texts : list
+        List of string text of the timeseries elements with the new values
+    """
+    # i.e. 2014-01-01T00:00:00-05:00
+    date_strs = [get_child_text(element_text = text, child = "SeriesDate").split("T")[0] for text in element_texts]
+    dates = helpers.parse_dates(date_strs = date_strs, order = "ymd", separator = "-")
+    date_factors = helpers.get_date_factors(dates = dates, factors = factors)
+
+    values = np.array([get_child_text(element_text = text, child = "SeriesValue") for text in element_texts], dtype = float)
+
+    # calculate new values based on monthly factors
+    if element == "ClimaticTemperatureSeries":
+        new_values = values + date_factors
+    else:
+        new_values = values * date_factors
+
+    new_texts = [substitute_child_text(element_text = text, child = "SeriesValue", new_text = new_value) for text, new_value in zip(element_texts, format_series_values(values = new_values))]
+
+    return new_texts
+
+def iter_element_blocks(filestream, tags, block_size = 2 ** 20):
+    """
+    Read an xml file one block at a time and split the text of each block into 
+    pieces, where each complete element with one of the tags is a piece of its own.
+    Joining the text of all the pieces gives back the text of the file.
+
+    Parameters
+    ----------
+    filestream : file object
+        A file object that contains an open xml file
+    tags : list
+        List of string names of the elements to split out
+    block_size : int
+        Number of bytes read at a time
+
+    Yields
+    ------
+    pieces : list
+        List of (tag, text) tuples for each block; tag is None for the text between the elements
+    """
+    # elements may have attributes or be self-closing
+    element_pattern = re.compile(r"<({})(?:\s[^>]*?)?(?:/>|>.*?</\1\s*>)".format("|".join(tags)), re.DOTALL)
+    start_pattern = re.compile(r"<(?:{})[\s/>]".format("|".join(tags)))
+
+    text = ""
+    while True:
+        block = filestream.read(block_size)
+        text += block
+
+        pieces = []
+        position = 0
+        for match in element_pattern.finditer(text):
+            pieces.append((None, text[position:match.start()]))
+            pieces.append((match.group(1), match.group(0)))
+            position = match.end()
+
+        text = text[position:]
+        if not block:
+            pieces.append((None, text))
+            yield pieces
+            break
+
+        # keep an incomplete element or tag for the next block
+        start = start_pattern.search(text)
+        if start:
+            keep = start.start()
+        else:
+            keep = text.rfind("<") if "<" in text else len(text)
+
+        pieces.append((None, text[:keep]))
+        text = text[keep:]
+
+        yield pieces
+
+def get_child_text(element_text, child):
+    """   
+    Get the text of a child element from the text of an element.
+    
+    Parameters
+    ----------
+    element_text : string 
+        String text of an element
+    child : string
+        String name of the child element
+
+    Returns
+    -------
+    text : string 
+        String text of the child element
+    """
+    match = re.search(r"<{0}>(.*?)</{0}>".format(child), element_text, re.DOTALL)
+
+    return match.group(1)
+
+def substitute_child_text(element_text, child, new_text):
+    """   
+    Substitute the text of a child element in the text of an element.
+    
+    Parameters
+    ----------
+    element_text : string 
+        String text of an element
+    child : string
+        String name of the child element
+    new_text : string
+        String new text of the child element
+
+    Returns
+    -------
+    element_text : string 
+        String text of the element with the new child text
+    """
+    match = re.search(r"<{0}>(.*?)</{0}>".format(child), element_text, re.DOTALL)
+
+    return element_text[:match.start(1)] + new_text + element_text[match.end(1):]
+
+def get_element_text(filepath, element, child):
+    """   
+    Get the text of the first child element of an element without parsing the rest 
+    of the file. For example, get the project name (ProjName) of the Project.
+    
+    Parameters
+    ----------
+    filepath : string
+        String path to xml file
+    element : string
+        String name of the parent element
+    child : string
+        String name of the child element
+
+    Returns
+    -------
+    text : string 
+        String text of the child element; an empty string if the child element has no
+        text and None if there is no such child element
+    """
+    path = []
+    with open(filepath, "rb") as f:
+        for event, elem in ET.iterparse(f, events = ("start", "end")):
+            if event == "start":
+                path.append(elem.tag)
+                continue
+
+            path.pop()
+            if elem.tag == child and path and path[-1] == element:
+                return elem.text or ""
+
+    return None
+
+def get_data(waterxml_data):
+    """   
+    Get the project, study, and simulation dictionaries of WATER \*.xml data.
+    
+    Parameters
+    ----------
+    waterxml_data : ElementTree object or tuple
+        Tree object of WATER \*.xml file, or a (project, study, simulation) tuple
+        from read_xml_data(), load_columnar(), or read_columnar()
+
+    Returns
+    -------
+    project : dictionary 
+        Dictionary containing information found in the 'Project' element
+    study : dictionary 
+        Dictionary containing information found in the 'Study' element
+    simulation : dictionary 
+        Dictionary containing information found in the 'StudySimulation' element
+    """
+    if isinstance(waterxml_data, tuple):
+        project, study, simulation = waterxml_data
+    else:
+        project, study, simulation = get_xml_data(waterxml_tree = waterxml_data)
+
+    return project, study, simulation
+
+def get_text_columns(records, field):
+    """   
+    Get the text of a field of each record dictionary as a column of unicode text 
+    and a column of states of the text.
+    
+    Parameters
+    ----------
+    records : list
+        List of dictionaries of string text
+    field : string
+        String key of the field
+
+    Returns
+    -------
+    texts : numpy array
+        Array of unicode text; empty for records without text
+    states : numpy array
+        Array of int states; 0 if the record does not have the field, 1 if the text is None, 2 otherwise
+    """
+    texts = np.array([record.get(field) or u"" for record in records], dtype = unicode)
+    states = np.array([0 if field not in record else 1 if record[field] is None else 2 for record in records], dtype = np.int8)
+
+    return texts, states
+
+def get_text_records(texts, states, fields):
+    """   
+    Get record dictionaries from columns of text and states made by get_text_columns(). 
+    Text that is all ascii is a string, the same as the text from an xml parser.
+    
+    Parameters
+    ----------
+    texts : dictionary
+        Dictionary of fields and arrays of unicode text
+    states : dictionary
+        Dictionary of fields and arrays of int states
+    fields : list
+        List of string keys of the fields
+
+    Returns
+    -------
+    records : list
+        List of dictionaries of string text
+    """
+    num_records = len(states[fields[0]]) if fields else 0
+
+    records = [{} for i in range(num_records)]
+    for field in fields:
+        for record, text, state in zip(records, texts[field].tolist(), states[field].tolist()):
+            if state == 0:
+                continue
+            elif state == 1:
+                record[field] = None
+            else:
+                try:
+                    record[field] = text.encode("ascii")
+                except UnicodeEncodeError:
+                    record[field] = text
+
+    return records
+
+def export_columnar(waterxml_tree, filepath, source_filepath = None):
+    """   
+    Export the information of interest of WATER \*.xml data to a compact columnar numpy \*.npz 
+    file that load_columnar() reads without parsing any xml. Each timeseries is stored as 
+    an array of dates and an array of values; features, topographic wetness index bins, and 
+    other text are stored as columns of text.
+    
+    Parameters
+    ----------
+    waterxml_tree : ElementTree object or tuple
+        Tree object of WATER \*.xml file, or a (project, study, simulation) tuple from read_xml_data()
+    filepath : string
+        String path of the \*.npz file
+    source_filepath : string
+        String path of the xml file the data was read from; its size and md5 hash are stored 
+        in "source/size" and "source/md5" columns so read_columnar() can check that the 
+        \*.npz file is current
+
+    Notes
+    -----
+    Columns are named "<element>/<field>" with a matching "<element>/<field>/states" column 
+    (see get_text_columns()), and "<element>/fields" holds the names of the fields. The 
+    "StudySimulation" element holds the 'SimulID', 'StudyID', and 'RegionType' of each simulation, 
+    and "<element>/simulations" holds the SimulID index of each feature and bin. Each timeseries
+    has "<element>/dates", "<element>/values", and "<element>/offsets" columns, where the 
+    dates and values of SimulID index i are between offsets[i] and offsets[i + 1].
+
+    See Also
+    --------
+    load_columnar : Load the information of interest from a columnar \*.npz file
+    read_columnar : Read a WATER \*.xml file through a columnar \*.npz file next to it
+    """
+    project, study, simulation = get_data(waterxml_data = waterxml_tree)
+
+    num_simulations = len(simulation["SimulID"])
+    simulations = [dict((key, simulation[key][i]) for key in ["SimulID", "StudyID", "RegionType"]) for i in range(num_simulations)]
+
+    # text of the project, study, simulations, features, and bins
+    tables = {"Project": ([project], None), "Study": ([study], None), "StudySimulation": (simulations, None)}
+    for key in ["SimulationFeatures", "SimulationTopographicWetnessIndex"]:
+        tables[key] = ([record for i in range(num_simulations) for record in simulation[key][i]], 
+                       [i for i in range(num_simulations) for record in simulation[key][i]])
+
+    columns = {}
+    for key, (records, simulation_indices) in tables.iteritems():
+        fields = sorted(set(field for record in records for field in record))
+        columns[key + "/fields"] = np.array(fields, dtype = unicode)
+
+        for field in fields:
+            columns["{}/{}".format(key, field)], columns["{}/{}/states".format(key, field)] = get_text_columns(records = records, field = field)
+
+        if simulation_indices is not None:
+            columns[key + "/simulations"] = np.array(simulation_indices, dtype = np.int64)
+
+    # dates and values of the timeseries of each simulation one after another
+    for key in ["StudyUnitDischargeSeries", "ClimaticPrecipitationSeries", "ClimaticTemperatureSeries"]:
+        dates, values, units = get_timeseries_data(simulation_dict = simulation, timeseries_key = key)
+
+        columns[key + "/dates"] = np.array([date for dates_i in dates for date in dates_i], dtype = "datetime64[us]").astype("datetime64[D]")
+        columns[key + "/values"] = np.concatenate([np.zeros(0)] + list(values)).astype(float)
+        columns[key + "/offsets"] = np.cumsum([0] + [len(values_i) for values_i in values]).astype(np.int64)
+        columns[key + "/units"], columns[key + "/units/states"] = get_text_columns(records = [{"units": unit} for unit in units], field = "units")
+
+    if source_filepath is not None:
+        key = helpers.get_file_key(filepath = source_filepath)
+        for name in ["size", "md5"]:
+            columns["source/" + name] = np.array(key[name])
+
+    with open(filepath, "wb") as f:
+        np.savez(f, **columns)
+
+def load_columnar_key(filepath):
+    """   
+    Load the size and md5 hash of the xml file that a columnar 
+    \*.npz file was exported from; see export_columnar().
+    
+    Parameters
+    ----------
+    filepath : string
+        String path of the \*.npz file
+
+    Returns
+    -------
+    key : dictionary 
+        Dictionary with "size" and "md5" keys; None if the \*.npz file has no key
+    """
+    with np.load(filepath) as columns:
+        if "source/md5" not in columns.files:
+            return None
+
+        key = dict((name, columns["source/" + name].item()) for name in ["size", "md5"])
+
+    return key
+
+def load_columnar(filepath):
+    """   
+    Load the information of interest of WATER \*.xml data from a columnar \*.npz 
+    file written by export_columnar(). 
+    
+    Parameters
+    ----------
+    filepath : string
+        String path of the \*.npz file
+
+    Returns
+    -------
+    project : dictionary 
+        Dictionary containing information found in the 'Project' element
+    study : dictionary 
+        Dictionary containing information found in the 'Study' element
+    simulation : dictionary 
+        Dictionary containing information found in the 'StudySimulation' element
+
+    Notes
+    -----
+    The dictionaries are the same as the dictionaries from read_xml_data(); 
+    each timeseries of the simulation dictionary is a timeseries dictionary and 
+    identical timeseries share their arrays.
+    """
+    with np.load(filepath) as columns:
+        records = {}
+        for key in ["Project", "Study", "StudySimulation", "SimulationFeatures", "SimulationTopographicWetnessIndex"]:
+            fields = [str(field) for field in columns[key + "/fields"].tolist()]
+            texts = dict((field, columns["{}/{}".format(key, field)]) for field in fields)
+            states = dict((field, columns["{}/{}/states".format(key, field)]) for field in fields)
+
+            records[key] = get_text_records(texts = texts, states = states, fields = fields)
+
+        project = create_project_dict()
+        project.update(records["Project"][0] if records["Project"] else {})
+
+        study = create_study_dict()
+        study.update(records["Study"][0] if records["Study"] else {})
+
+        simulation = create_simulation_dict()
+        for key in ["SimulID", "StudyID", "RegionType"]:
+            simulation[key] = [record.get(key) for record in records["StudySimulation"]]
+
+        num_simulations = len(simulation["SimulID"])
+
+        for key in ["SimulationFeatures", "SimulationTopographicWetnessIndex"]:
+            simulation[key] = [[] for i in range(num_simulations)]
+            for i, record in zip(columns[key + "/simulations"].tolist(), records[key]):
+                simulation[key][i].append(record)
+
+        for key in ["StudyUnitDischargeSeries", "ClimaticPrecipitationSeries", "ClimaticTemperatureSeries"]:
+            dates = columns[key + "/dates"].astype("datetime64[us]").astype(object)
+            values = columns[key + "/values"]
+            offsets = columns[key + "/offsets"].tolist()
+            units = get_text_records(texts = {"units": columns[key + "/units"]}, states = {"units": columns[key + "/units/states"]}, fields = ["units"])
+
+            simulation[key] = [{"dates": dates[offsets[i]:offsets[i + 1]].copy(), 
+                                "values": values[offsets[i]:offsets[i + 1]].copy(), 
+                                "units": units[i].get("units")} for i in range(num_simulations)]
+
+    simulation = deduplicate_timeseries(simulation_dict = simulation)
+
+    return project, study, simulation
+
+def get_columnar_path(filepath):
+    """   
+    Get the path of the columnar \*.npz file that belongs to a WATER \*.xml file.
+    
+    Parameters
+    ----------
+    filepath : string
+        String path of the xml file
+
+    Returns
+    -------
+    columnar_path : string
+        String path of the \*.npz file
+    """
+    return filepath + ".columnar.npz"
+
+def read_columnar(filepath):
+    """   
+    Read the information of interest of a WATER \*.xml file from the columnar \*.npz file 
+    next to it. If the \*.npz file does not exist, cannot be loaded, or was not exported
+    from the current contents of the xml file, the xml file is parsed and exported to the 
+    \*.npz file first, so only the first run parses xml.
+    
+    Parameters
+    ----------
+    filepath : string
+        String path of the xml file
+
+    Returns
+    -------
+    project : dictionary 
+        Dictionary containing information found in the 'Project' element
+    study : dictionary 
+        Dictionary containing information found in the 'Study' element
+    simulation : dictionary 
+        Dictionary containing information found in the 'StudySimulation' element
+
+    Notes
+    -----
+    The \*.npz file is current when the size and md5 hash of the xml file match the ones
+    stored in it; see helpers.is_file_key_current().
+
+    See Also
+    --------
+    get_columnar_path : Get the path of the columnar \*.npz file
+    """
+    columnar_path = get_columnar_path(filepath = filepath)
+
+    if os.path.isfile(columnar_path):
+        try:
+            key = load_columnar_key(filepath = columnar_path)
+            if key is not None and helpers.is_file_key_current(filepath = filepath, key = key):
+                return load_columnar(filepath = columnar_path)
+        except (IOError, ValueError, KeyError, zipfile.BadZipfile) as error:
+            logging.warn("Could not load columnar file {}: {}".format(columnar_path, error))
+
+    waterxml_data = read_xml_data(filepath = filepath)
+
+    try:
+        export_columnar(waterxml_tree = waterxml_data, filepath = columnar_path, source_filepath = filepath)
+    except (IOError, OSError) as error:
+        logging.warn("Could not write columnar file {}: {}".format(columnar_path, error))
+
+    return waterxml_data
 
 def get_study_unit_areas(simulation_dict):
     """   
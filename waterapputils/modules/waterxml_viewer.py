@@ -37,7 +37,7 @@ def print_waterxml_data(waterxml_tree):
     print("")
     print("--- WATER XML FILE INFORMATION ---")
     
-    project, study, simulation = waterxml.get_xml_data(waterxml_tree = waterxml_tree)
+    project, study, simulation = waterxml.get_data(waterxml_data = waterxml_tree)
 
     print("Project Information:")
     print("    {}\n".format(project))
@@ -59,6 +59,15 @@ def print_waterxml_data(waterxml_tree):
         elif key in ["SimulationFeatures", "SimulationTopographicWetnessIndex", "StudyUnitDischargeSeries", "ClimaticPrecipitationSeries", "ClimaticTemperatureSeries"]:
             print("    {}".format(key))
             for i in range(len(value)):
+
+                # timeseries dictionary from waterxml.read_xml_data() or waterxml.read_columnar()
+                if isinstance(value[i], dict):
+                    print("")
+                    for k, v in value[i].iteritems():
+                        print("        {} : {}".format(k, v))
+                    print("")
+                    continue
+
                 for j in range(len(value[i])):
                     print("")
                     for k, v in value[i][j].iteritems():
@@ -81,7 +90,7 @@ def plot_waterxml_topographic_wetness_index_data(waterxml_tree, is_visible = Fal
     """
     twi_str = "Topographic Wetness Index"     
     
-    project, study, simulation = waterxml.get_xml_data(waterxml_tree = waterxml_tree)       
+    project, study, simulation = waterxml.get_data(waterxml_data = waterxml_tree)       
 
     for i in range(len(simulation["SimulID"])):
  
@@ -142,7 +151,7 @@ def plot_waterxml_timeseries_data(waterxml_tree, is_visible = False, save_path =
     save_path : string 
         String path to save plot(s)      
     """
-    project, study, simulation = waterxml.get_xml_data(waterxml_tree = waterxml_tree)       
+    project, study, simulation = waterxml.get_data(waterxml_data = waterxml_tree)       
 
     for i in range(len(simulation["SimulID"])):
         for timeseries_str in ["StudyUnitDischargeSeries", "ClimaticPrecipitationSeries", "ClimaticTemperatureSeries"]:         
@@ -231,8 +240,8 @@ def plot_waterxml_timeseries_comparison(waterxml_tree1, waterxml_tree2, is_visib
     save_path : string 
         String path to save plot(s)      
     """
-    project1, study1, simulation1 = waterxml.get_xml_data(waterxml_tree = waterxml_tree1)       
-    project2, study2, simulation2 = waterxml.get_xml_data(waterxml_tree = waterxml_tree2)
+    project1, study1, simulation1 = waterxml.get_data(waterxml_data = waterxml_tree1)       
+    project2, study2, simulation2 = waterxml.get_data(waterxml_data = waterxml_tree2)
 
     assert len(simulation1["SimulID"]) == len(simulation2["SimulID"]), "The lengths of the number of SimulID's between the 2 xml files are not equal."
 
@@ -18,6 +18,7 @@ is_batch_simulation = True
 basin_shapefile_name = "Watersheds.shp"
 basin_shapefile_id_field = "STAID"
 basin_shapefile_area_field = "da_sqmi"                  # if no area field, leave blank like this: ""
+spatial_join_processes = 1                              # number of processes to intersect the basins with the water use centroids or gcm tiles; 1 for no worker processes
 
 # ------------------- Water use information ----------------------------- #
 wateruse_centroids_shapefile = "../data/spatial-datafiles/wateruse-centroids/wateruse_centroids_sample_nad83.shp"
@@ -42,7 +43,7 @@ gcm_delta_tile_shapefile = "../data/spatial-datafiles/gcm-tiles/CanES_nad83.shp"
 gcm_delta_tile_shapefile_id_field = "Tile"
 
 # ------------------- Output directory and file names ------------------- #
-water_text_file_name = "WATER.txt"
+water_text_file_name = "WATER.txt"                      # reading a WATER.txt file writes WATER.txt.cache.npy and WATER.txt.cache.json cache files next to it
 water_database_file_name = "WATERSimulation.xml"
 
 info_directory_name = "waterapputils-info"
@@ -164,6 +165,7 @@ settings = {
     "basin_shapefile_name": basin_shapefile_name,
     "basin_shapefile_id_field": basin_shapefile_id_field,
     "basin_shapefile_area_field": basin_shapefile_area_field,
+    "spatial_join_processes": spatial_join_processes,
 	"water_text_file_name": water_text_file_name,
 	"water_database_file_name": water_database_file_name,
 
@@ -225,6 +227,7 @@ sample_single_settings = {
     "basin_shapefile_name": "basinMask.shp",
     "basin_shapefile_id_field": "",
     "basin_shapefile_area_field": "",
+    "spatial_join_processes": 1,
 
     "water_text_file_name": "WATER.txt",
     "water_database_file_name": "WATERSimulation.xml",
@@ -290,6 +293,7 @@ sample_batch_settings = {
     "basin_shapefile_name": "Watersheds.shp",
     "basin_shapefile_id_field": "STAID",
     "basin_shapefile_area_field": "da_sqmi",
+    "spatial_join_processes": 1,
     "water_text_file_name": "WATER.txt",
     "water_database_file_name": "WATERSimulation.xml",
 